@@ -0,0 +1,97 @@
+#################################################
+# chessAttacks.py
+#
+# Attack tables for the bitboard position, built once at import
+#################################################
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1),
+                (0, 1), (1, -1), (1, 0), (1, 1))
+
+# white pawns move towards row 0, black pawns towards row 7 (indexed by color)
+PAWN_DIRECTIONS = (-1, 1)
+
+# returns a bitboard of the on-board squares at offsets from square
+def getOffsetTargets(square, offsets):
+    row, col = square >> 3, square & 7
+    targets = 0
+    for (dRow, dCol) in offsets:
+        if 0 <= row + dRow < 8 and 0 <= col + dCol < 8:
+            targets |= 1 << ((row + dRow) * 8 + col + dCol)
+    return targets
+
+KNIGHT_ATTACKS = [getOffsetTargets(square, KNIGHT_OFFSETS) for square in range(64)]
+KING_ATTACKS = [getOffsetTargets(square, KING_OFFSETS) for square in range(64)]
+
+# PAWN_ATTACKS[color][square] is what a pawn of color on square can take
+PAWN_ATTACKS = [[getOffsetTargets(square, ((direction, -1), (direction, 1)))
+                 for square in range(64)]
+                for direction in PAWN_DIRECTIONS]
+
+# PAWN_PUSHES[color][square] is the square a pawn of color on square steps to
+PAWN_PUSHES = [[getOffsetTargets(square, ((direction, 0),)) for square in range(64)]
+               for direction in PAWN_DIRECTIONS]
+
+#################################################
+# SLIDING PIECES
+#################################################
+
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# returns a bitboard of every square from square (exclusive) to the edge in one direction
+def getRay(square, dRow, dCol):
+    row, col = (square >> 3) + dRow, (square & 7) + dCol
+    ray = 0
+    while 0 <= row < 8 and 0 <= col < 8:
+        ray |= 1 << (row * 8 + col)
+        row += dRow
+        col += dCol
+    return ray
+
+# (rays for each square, True if the ray runs towards higher square numbers)
+ROOK_RAYS = [([getRay(square, dRow, dCol) for square in range(64)], dRow * 8 + dCol > 0)
+             for (dRow, dCol) in ROOK_DIRECTIONS]
+BISHOP_RAYS = [([getRay(square, dRow, dCol) for square in range(64)], dRow * 8 + dCol > 0)
+               for (dRow, dCol) in BISHOP_DIRECTIONS]
+
+# returns the squares a slider on square reaches along rayTables for occupancy,
+# stopping at (and including) the first blocker on each ray
+def getSliderAttacks(square, occupancy, rayTables):
+    attacks = 0
+    for (rays, isPositive) in rayTables:
+        ray = rays[square]
+        blockers = ray & occupancy
+        if blockers:
+            if isPositive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            # everything beyond the first blocker is the blocker's own ray
+            ray ^= rays[blocker]
+        attacks |= ray
+    return attacks
+
+def getRookAttacks(square, occupancy):
+    return getSliderAttacks(square, occupancy, ROOK_RAYS)
+
+def getBishopAttacks(square, occupancy):
+    return getSliderAttacks(square, occupancy, BISHOP_RAYS)
+
+def getQueenAttacks(square, occupancy):
+    return (getSliderAttacks(square, occupancy, ROOK_RAYS) |
+            getSliderAttacks(square, occupancy, BISHOP_RAYS))
+
+# BETWEEN[a][b] is the squares strictly between a and b if they share a line, else 0
+def getBetween(fromSquare, toSquare):
+    dRow = (toSquare >> 3) - (fromSquare >> 3)
+    dCol = (toSquare & 7) - (fromSquare & 7)
+    if (dRow, dCol) == (0, 0) or (dRow != 0 and dCol != 0 and abs(dRow) != abs(dCol)):
+        return 0
+    stepRow = (dRow > 0) - (dRow < 0)
+    stepCol = (dCol > 0) - (dCol < 0)
+    return getRay(fromSquare, stepRow, stepCol) & getRay(toSquare, -stepRow, -stepCol)
+
+BETWEEN = [[getBetween(fromSquare, toSquare) for toSquare in range(64)]
+           for fromSquare in range(64)]
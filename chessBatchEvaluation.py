@@ -0,0 +1,244 @@
+#################################################
+# chessBatchEvaluation.py
+#
+# Batched leaf evaluation: the children of a node one ply above the leaves
+# are collected into NumPy arrays of piece codes and scored together, with
+# material, piece-square tables and mobility computed by vectorized
+# operations. NumPy is optional: without it each position is scored as it
+# is added, by the same evaluation in plain Python
+#################################################
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from chessAttacks import (KNIGHT_ATTACKS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS,
+                          getRookAttacks, getBishopAttacks, getQueenAttacks)
+from chessEvaluation import (MG_PIECE_VALUES, EG_PIECE_VALUES, MG_TABLES, EG_TABLES,
+                             PHASE_WEIGHTS, MAX_PHASE)
+from chessPosition import (WHITE, BLACK, KNIGHT, BISHOP, ROOK, QUEEN, makePiece,
+                           iterSquares, countBits)
+
+# bonus per square a piece attacks that its own side does not occupy,
+# indexed by piece type (pawns and kings get none)
+MOBILITY_PIECES = (KNIGHT, BISHOP, ROOK, QUEEN)
+MG_MOBILITY_SCORES = (0, 0, 4, 5, 2, 1, 0)
+EG_MOBILITY_SCORES = (0, 0, 4, 5, 4, 2, 0)
+
+#################################################
+# SCALAR EVALUATION
+#################################################
+
+def getMobilityAttacks(pieceType, square, occupancy):
+    if pieceType == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    elif pieceType == BISHOP:
+        return getBishopAttacks(square, occupancy)
+    elif pieceType == ROOK:
+        return getRookAttacks(square, occupancy)
+    return getQueenAttacks(square, occupancy)
+
+# returns counts[pieceType], the squares color's pieces of each type attack
+# that color does not occupy
+def getMobilityCounts(position, color):
+    occupancy = position.occupancy[WHITE] | position.occupancy[BLACK]
+    notOwn = ~position.occupancy[color]
+    counts = [0] * 7
+    for pieceType in MOBILITY_PIECES:
+        for square in iterSquares(position.bitboards[makePiece(color, pieceType)]):
+            counts[pieceType] += countBits(getMobilityAttacks(pieceType, square, occupancy)
+                                           & notOwn)
+    return counts
+
+# the position's tapered evaluation (see Position.getEvaluation) plus the
+# mobility bonus, for the side to move; what a batch scores each position
+def evaluateWithMobility(position):
+    mgScore, egScore = position.mgScore, position.egScore
+    for (color, sign) in ((WHITE, 1), (BLACK, -1)):
+        counts = getMobilityCounts(position, color)
+        for pieceType in MOBILITY_PIECES:
+            mgScore += sign * counts[pieceType] * MG_MOBILITY_SCORES[pieceType]
+            egScore += sign * counts[pieceType] * EG_MOBILITY_SCORES[pieceType]
+    phase = min(position.phase, MAX_PHASE)
+    score = (mgScore * phase + egScore * (MAX_PHASE - phase)) // MAX_PHASE
+    if position.sideToMove == BLACK:
+        return -score
+    return score
+
+#################################################
+# VECTORIZED EVALUATION
+#################################################
+
+# tables indexed by piece code (type | color << 3), white positive: piece
+# values, piece-square tables without the values, phase weights, and the
+# mobility bonus per attacked square
+def getPieceCodeTables():
+    tables = {}
+    for name in ("mgValues", "egValues", "phases", "mgMobility", "egMobility"):
+        tables[name] = np.zeros(16, dtype = np.int64)
+    for name in ("mgSquares", "egSquares"):
+        tables[name] = np.zeros((16, 64), dtype = np.int64)
+    for pieceType in range(1, 7):
+        for (color, sign) in ((WHITE, 1), (BLACK, -1)):
+            piece = makePiece(color, pieceType)
+            tables["mgValues"][piece] = sign * MG_PIECE_VALUES[pieceType]
+            tables["egValues"][piece] = sign * EG_PIECE_VALUES[pieceType]
+            tables["phases"][piece] = PHASE_WEIGHTS[pieceType]
+            tables["mgMobility"][piece] = sign * MG_MOBILITY_SCORES[pieceType]
+            tables["egMobility"][piece] = sign * EG_MOBILITY_SCORES[pieceType]
+            # a black piece reads the white table mirrored top to bottom
+            flip = 0 if color == WHITE else 56
+            for square in range(64):
+                tables["mgSquares"][piece, square] = sign * MG_TABLES[pieceType][square ^ flip]
+                tables["egSquares"][piece, square] = sign * EG_TABLES[pieceType][square ^ flip]
+    return tables
+
+# raySquares[square][direction][step] is the square step + 1 squares from
+# square along direction (rook directions first, then bishop ones), or 64
+# off the board
+def getRaySquares():
+    raySquares = np.full((64, 8, 7), 64, dtype = np.intp)
+    directions = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+    for square in range(64):
+        for (direction, (dRow, dCol)) in enumerate(directions):
+            for step in range(7):
+                row = (square >> 3) + dRow * (step + 1)
+                col = (square & 7) + dCol * (step + 1)
+                if 0 <= row < 8 and 0 <= col < 8:
+                    raySquares[square, direction, step] = row * 8 + col
+    return raySquares
+
+# sliderDirections[pieceType][direction] is True if pieceType slides that way
+def getSliderDirections():
+    directions = np.zeros((7, 8), dtype = bool)
+    directions[ROOK, :4] = directions[BISHOP, 4:] = directions[QUEEN] = True
+    return directions
+
+# knightTargets[square] is the squares a knight on square attacks, padded
+# to 8 with 64
+def getKnightTargets():
+    targets = np.full((64, 8), 64, dtype = np.intp)
+    for square in range(64):
+        for (idx, target) in enumerate(iterSquares(KNIGHT_ATTACKS[square])):
+            targets[square, idx] = target
+    return targets
+
+# every square is in one of four states: empty, white, black, or off the
+# board; the states of a ray's 7 squares make a base-4 number, its pattern
+EMPTY_STATE, WHITE_STATE, BLACK_STATE, EDGE_STATE = range(4)
+
+# rayReach[color][pattern]: how many squares of a ray with pattern a slider
+# of color reaches without landing on its own piece
+def getRayReach():
+    reach = np.zeros((2, 4 ** 7), dtype = np.int64)
+    for color in (WHITE, BLACK):
+        enemyState = BLACK_STATE if color == WHITE else WHITE_STATE
+        for pattern in range(4 ** 7):
+            for step in range(7):
+                state = (pattern >> (2 * step)) & 3
+                if state == EMPTY_STATE or state == enemyState:
+                    reach[color, pattern] += 1
+                if state != EMPTY_STATE:
+                    break
+    return reach
+
+# the tables above, built the first time a batch is scored: batches are
+# off by default, so importing the module builds nothing
+batchTables = {}
+
+def getBatchTables():
+    if batchTables == {}:
+        batchTables.update(getPieceCodeTables())
+        batchTables["raySquares"] = getRaySquares()
+        batchTables["rayPowers"] = 4 ** np.arange(7)
+        batchTables["rayReach"] = getRayReach()
+        batchTables["sliderDirections"] = getSliderDirections()
+        batchTables["knightTargets"] = getKnightTargets()
+        batchTables["squareIndices"] = np.arange(64)
+    return batchTables
+
+# returns the (N, 16) count of each piece code on boards, an (N, 64) array
+# of piece codes
+def getPieceCounts(boards):
+    codes = (np.arange(len(boards))[:, None] * 16 + boards).ravel()
+    return np.bincount(codes, minlength = len(boards) * 16).reshape(len(boards), 16)
+
+# returns the (N, 16) mobility of each piece code on boards: the squares
+# its knights, bishops, rooks and queens attack that their own side does
+# not occupy, found for every such piece of the batch at once
+def getBatchMobility(boards, tables):
+    numBoards = len(boards)
+    # the state of every square, one more per board past the edge, flattened
+    states = np.full((numBoards, 65), EDGE_STATE, dtype = np.intp)
+    states[:, :64] = np.where(boards == 0, EMPTY_STATE, (boards >> 3) + WHITE_STATE)
+    states = states.ravel()
+    pieceTypes = boards & 7
+    mobility = np.zeros(numBoards * 16)
+
+    # sliders: each ray's pattern gives its reach
+    boardIdx, squares = np.nonzero((pieceTypes >= BISHOP) & (pieceTypes <= QUEEN))
+    pieces = boards[boardIdx, squares]
+    rayStates = states[(boardIdx * 65)[:, None, None] + tables["raySquares"][squares]]
+    reach = tables["rayReach"][(pieces >> 3)[:, None], rayStates @ tables["rayPowers"]]
+    reach = (reach * tables["sliderDirections"][pieces & 7]).sum(axis = 1)
+    mobility += np.bincount(boardIdx * 16 + pieces, reach, numBoards * 16)
+
+    # knights: targets that are empty or hold an enemy piece
+    boardIdx, squares = np.nonzero(pieceTypes == KNIGHT)
+    pieces = boards[boardIdx, squares]
+    targetStates = states[(boardIdx * 65)[:, None] + tables["knightTargets"][squares]]
+    enemyStates = np.where(pieces >> 3 == WHITE, BLACK_STATE, WHITE_STATE)
+    reach = ((targetStates == EMPTY_STATE) |
+             (targetStates == enemyStates[:, None])).sum(axis = 1)
+    mobility += np.bincount(boardIdx * 16 + pieces, reach, numBoards * 16)
+    return mobility.astype(np.int64).reshape(numBoards, 16)
+
+# scores boards (an (N, 64) array of piece codes) with sides to move sides,
+# the same as evaluateWithMobility would
+def scoreBoards(boards, sides):
+    tables = getBatchTables()
+    counts = getPieceCounts(boards)
+    mobility = getBatchMobility(boards, tables)
+    mgScores = (counts @ tables["mgValues"]
+                + tables["mgSquares"][boards, tables["squareIndices"]].sum(axis = 1)
+                + mobility @ tables["mgMobility"])
+    egScores = (counts @ tables["egValues"]
+                + tables["egSquares"][boards, tables["squareIndices"]].sum(axis = 1)
+                + mobility @ tables["egMobility"])
+    phases = np.minimum(counts @ tables["phases"], MAX_PHASE)
+    scores = (mgScores * phases + egScores * (MAX_PHASE - phases)) // MAX_PHASE
+    return np.where(sides == BLACK, -scores, scores)
+
+#################################################
+# BATCHES
+#################################################
+
+class BatchEvaluator(object):
+    def __init__(self):
+        self.boards = []
+        self.sides = []
+        # scores of positions added without NumPy
+        self.scores = []
+
+    # adds position to the batch; it may be changed as soon as this returns
+    def add(self, position):
+        if np == None:
+            self.scores.append(evaluateWithMobility(position))
+        else:
+            self.boards.append(position.board[:])
+            self.sides.append(position.sideToMove)
+
+    # returns the score of every position added since the last call, for
+    # the side to move, in the order they were added, and empties the batch
+    def scoreBatch(self):
+        if np == None:
+            scores = self.scores
+        elif self.boards == []:
+            scores = []
+        else:
+            scores = scoreBoards(np.array(self.boards, dtype = np.intp),
+                                 np.array(self.sides)).tolist()
+        self.boards = []
+        self.sides = []
+        self.scores = []
+        return scores
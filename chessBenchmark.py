@@ -0,0 +1,566 @@
+#################################################
+# chessBenchmark.py
+#
+# Times the AI search on the keyPressed scenario positions
+# usage: python chessBenchmark.py [depth]
+#################################################
+
+import os
+import random
+import sys
+import time
+from chessPosition import (Position, WHITE, BLACK, KING, moveFrom, moveTo,
+                           squareToRowCol, getStartPosition)
+from chessAttacks import KING_ATTACKS
+from chessScenarios import SCENARIO_KEYS, getScenarioPosition
+from chessSearch import Search, INFINITY, MATE_SCORE, MATE_BOUND, PAWN_SCORE, evaluate
+from chessParallel import ParallelSearch
+from chessBook import OpeningBook, BOOK_PATH, RECORDS_PATH, nameToMove
+from chessTablebase import Tablebase, getSignaturePieces
+import chessBatchEvaluation
+from chessBatchEvaluation import BatchEvaluator, evaluateWithMobility
+
+#################################################
+# COPY-MAKE VS MAKE/UNMAKE
+#################################################
+
+# legal moves found by copying the position for every candidate move
+def copyMakeLegalMoves(position):
+    legalMoves = []
+    for move in position.getPseudoMoves():
+        child = position.copy()
+        child.makeMove(move)
+        if not child.isChecked(position.sideToMove):
+            legalMoves.append(move)
+    return legalMoves
+
+# copy-make plays a move on a copy of the position and has nothing to take back
+def copyMakeMove(position, move):
+    child = position.copy()
+    child.makeMove(move)
+    return child
+
+def copyUnmakeMove(position, move):
+    pass
+
+# make/unmake plays every move on the one position and takes it back
+def makeMoveInPlace(position, move):
+    position.makeMove(move)
+    return position
+
+def unmakeMoveInPlace(position, move):
+    position.unmakeMove(move)
+
+# (legalMovesFn, makeMoveFn, unmakeMoveFn) for each way of playing moves:
+# makeMoveFn returns the child position and unmakeMoveFn restores the parent
+COPY_MAKE = (copyMakeLegalMoves, copyMakeMove, copyUnmakeMove)
+MAKE_UNMAKE = (Position.getLegalMoves, makeMoveInPlace, unmakeMoveInPlace)
+
+# aiMode_minimax on the bitboard position, playing moves the way moveFns
+# (COPY_MAKE or MAKE_UNMAKE) does, so both ways search the same tree
+def minimax(position, depth, moveFns, alpha = -10000, beta = 10000):
+    legalMovesFn, makeMoveFn, unmakeMoveFn = moveFns
+    isMaxPlayerTurn = position.sideToMove == WHITE
+    isChecked = position.isChecked(position.sideToMove)
+    moves = None
+    isMated = False
+    if isChecked or depth > 0:
+        moves = legalMovesFn(position)
+        isMated = isChecked and moves == []
+
+    if depth == 0 or isMated:
+        posVal = position.getMaterial()
+        bonus = (50 if isMated else 0) + (15 if isChecked else 0)
+        if isMaxPlayerTurn:
+            return posVal - bonus
+        return posVal + bonus
+    elif moves == []:
+        return 0
+
+    bestEval = -100000 if isMaxPlayerTurn else 100000
+    for move in moves:
+        child = makeMoveFn(position, move)
+        eval = minimax(child, depth - 1, moveFns, alpha, beta)
+        unmakeMoveFn(position, move)
+        if isMaxPlayerTurn:
+            bestEval = max(bestEval, eval)
+            alpha = max(alpha, eval)
+        else:
+            bestEval = min(bestEval, eval)
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+    return bestEval
+
+#################################################
+# ORIGINAL CHESSPIECE SEARCH
+#################################################
+
+# a copy of chessGame.py from before the bitboard Position, for timing its
+# ChessPiece search: git show 94d936d:chessGame.py > baselineGame.py
+BASELINE_GAME_PATH = "baselineGame.py"
+
+# the app the original game's functions are called with
+class BaselineApp(object):
+    def __init__(self):
+        self.width = self.height = 600
+
+    def loadImage(self, path):
+        return None
+
+class BaselineKeyEvent(object):
+    def __init__(self, key):
+        self.key = key
+
+# returns the globals of the original game at path, run without opening its
+# window, or None if there is no such file
+def loadBaselineGame(path = BASELINE_GAME_PATH):
+    try:
+        with open(path) as gameFile:
+            source = gameFile.read()
+    except FileNotFoundError:
+        return None
+    source = source.replace("runApp(width = 600, height = 600)", "")
+    game = {"__name__": "baselineGame"}
+    exec(compile(source, path, "exec"), game)
+    return game
+
+# times the original aiMode_getMinimaxBestMove (black to move, root + depth 1)
+# on scenario key the way its aiMode_timerFired called it, on copies of the
+# pieces and board; returns seconds, or None if the original search fails
+def timeBaselineSearch(game, key):
+    app = BaselineApp()
+    game["appStarted"](app)
+    game["keyPressed"](app, BaselineKeyEvent(key))
+    startTime = time.perf_counter()
+    try:
+        game["aiMode_getMinimaxBestMove"](app, game["copyPieces"](app, app.whitePieces),
+                                          game["copyPieces"](app, app.blackPieces),
+                                          game["copyGameBoard"](app, app.gameBoard))
+    except Exception:
+        return None
+    return time.perf_counter() - startTime
+
+#################################################
+# BENCHMARKS
+#################################################
+
+# runs minimax on every root move like aiMode_getMinimaxBestMove, returns seconds
+def timeRootSearch(position, depth, moveFns):
+    startTime = time.perf_counter()
+    for move in position.getLegalMoves():
+        position.makeMove(move)
+        minimax(position, depth, moveFns)
+        position.unmakeMove(move)
+    return time.perf_counter() - startTime
+
+# prints copy-make vs make/unmake search times for every scenario
+def benchmarkMakeUnmake(depth):
+    print(f"make/unmake vs copy-make, root + depth {depth}")
+    print(f"{'key':>4} {'copy (s)':>10} {'unmake (s)':>11} {'speedup':>8}")
+    totalBefore, totalAfter = 0, 0
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        before = timeRootSearch(position, depth, COPY_MAKE)
+        after = timeRootSearch(position, depth, MAKE_UNMAKE)
+        totalBefore += before
+        totalAfter += after
+        print(f"{key:>4} {before:>10.3f} {after:>11.3f} {before / after:>7.2f}x")
+    print(f"{'all':>4} {totalBefore:>10.3f} {totalAfter:>11.3f} {totalBefore / totalAfter:>7.2f}x")
+
+# prints the original ChessPiece search's time on every scenario against
+# make/unmake on the same positions (black to move, root + depth 1)
+def benchmarkBaselineSearch(path = BASELINE_GAME_PATH):
+    game = loadBaselineGame(path)
+    if game == None:
+        print(f"original ChessPiece search: no {path}, skipped")
+        return
+    print("original ChessPiece search vs make/unmake, black to move, root + depth 1")
+    print(f"{'key':>4} {'pieces (s)':>11} {'unmake (s)':>11} {'speedup':>8}")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        if position.sideToMove == WHITE:
+            position.makeNullMove()
+        before = timeBaselineSearch(game, key)
+        after = timeRootSearch(position, 1, MAKE_UNMAKE)
+        if before == None:
+            print(f"{key:>4} {'failed':>11} {after:>11.3f}")
+        else:
+            print(f"{key:>4} {before:>11.3f} {after:>11.3f} {before / after:>7.2f}x")
+
+# returns move as "fromRow,fromCol-toRow,toCol"
+def moveToString(move):
+    (fromRow, fromCol) = squareToRowCol(moveFrom(move))
+    (toRow, toCol) = squareToRowCol(moveTo(move))
+    return f"{fromRow}{fromCol}-{toRow}{toCol}"
+
+# runs search.getBestMove on position, returns (nodes, seconds)
+def timeSearch(search, position, depth):
+    search.nodes = 0
+    startTime = time.perf_counter()
+    search.getBestMove(position, depth)
+    return search.nodes, time.perf_counter() - startTime
+
+# prints nodes and times with and without the transposition table
+def benchmarkTranspositionTable(depth, ttSizeMB = 16):
+    print(f"transposition table ({ttSizeMB} MB), depth {depth}")
+    print(f"{'key':>4} {'nodes off':>10} {'nodes on':>9} {'time off':>9} "
+          f"{'time on':>8} {'hits':>7} {'collisions':>10}")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        nodesOff, timeOff = timeSearch(Search(0, useTranspositionTable = False),
+                                       position, depth)
+        search = Search(ttSizeMB)
+        nodesOn, timeOn = timeSearch(search, position, depth)
+        stats = search.tt.getStats()
+        print(f"{key:>4} {nodesOff:>10} {nodesOn:>9} {timeOff:>9.3f} {timeOn:>8.3f} "
+              f"{stats['hits']:>7} {stats['collisions']:>10}")
+
+# prints nodes and first-move cutoff rates with and without move ordering
+def benchmarkMoveOrdering(depth):
+    print(f"move ordering, depth {depth}")
+    print(f"{'key':>4} {'nodes off':>10} {'nodes on':>9} {'time off':>9} "
+          f"{'time on':>8} {'1st cut off':>12} {'1st cut on':>11}")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        searchOff = Search(useMoveOrdering = False)
+        nodesOff, timeOff = timeSearch(searchOff, position, depth)
+        searchOn = Search()
+        nodesOn, timeOn = timeSearch(searchOn, position, depth)
+        print(f"{key:>4} {nodesOff:>10} {nodesOn:>9} {timeOff:>9.3f} {timeOn:>8.3f} "
+              f"{searchOff.getFirstMoveCutoffRate():>12.2f} "
+              f"{searchOn.getFirstMoveCutoffRate():>11.2f}")
+
+# prints nodes and chosen moves with and without quiescence search
+def benchmarkQuiescence(depth):
+    print(f"quiescence search, depth {depth}")
+    print(f"{'key':>4} {'nodes off':>10} {'nodes on':>9} {'q nodes':>8} "
+          f"{'move off':>9} {'move on':>8}")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        searchOff = Search(useQuiescence = False)
+        searchOn = Search()
+        moveOff, scoreOff = searchOff.getBestMove(position, depth)
+        moveOn, scoreOn = searchOn.getBestMove(position, depth)
+        print(f"{key:>4} {searchOff.nodes:>10} {searchOn.nodes:>9} "
+              f"{searchOn.quiescenceNodes:>8} {moveToString(moveOff):>9} "
+              f"{moveToString(moveOn):>8}")
+
+# prints nodes for plain alpha-beta, PVS, and PVS with aspiration windows
+def benchmarkPVS(depth):
+    print(f"principal variation search, depth {depth}")
+    print(f"{'key':>4} {'alpha-beta':>11} {'pvs':>8} {'pvs+asp':>8} "
+          f"{'re-searches':>12} {'asp fails':>10}")
+    totals = [0, 0, 0]
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        searches = [Search(usePVS = False, useAspiration = False),
+                    Search(useAspiration = False), Search()]
+        nodes = [timeSearch(search, position, depth)[0] for search in searches]
+        for idx in range(len(nodes)):
+            totals[idx] += nodes[idx]
+        print(f"{key:>4} {nodes[0]:>11} {nodes[1]:>8} {nodes[2]:>8} "
+              f"{searches[2].pvsResearches:>12} {searches[2].aspirationResearches:>10}")
+    print(f"{'all':>4} {totals[0]:>11} {totals[1]:>8} {totals[2]:>8}")
+
+# (label, Search keyword arguments) for the selective search comparisons
+SELECTIVE_CONFIGS = [("full", {"useNullMove": False, "useLMR": False}),
+                     ("null", {"useLMR": False}),
+                     ("lmr", {"useNullMove": False}),
+                     ("both", {})]
+
+FORWARD_PRUNING_CONFIGS = [("none", {"useFutility": False, "useRazoring": False}),
+                           ("futility", {"useRazoring": False}),
+                           ("razoring", {"useFutility": False}),
+                           ("both", {})]
+
+SEE_CONFIGS = [("see off", {"useSEE": False}), ("see on", {})]
+
+# prints nodes at depth and the depth reached in timeLimit seconds for each
+# (label, Search keyword arguments) in configs, with the move each one picks
+def benchmarkSearchConfigs(title, configs, depth, timeLimit):
+    print(f"{title}: nodes at depth {depth}, depth in {timeLimit} s")
+    header = "".join(f"{label:>9} {'d':>3}" for (label, kwargs) in configs)
+    print(f"{'key':>4}{header}  moves")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        row, moves = "", []
+        for (label, kwargs) in configs:
+            nodes = timeSearch(Search(**kwargs), position, depth)[0]
+            search = Search(**kwargs)
+            bestMove, score = search.getBestMove(position, 64, timeLimit)
+            row += f"{nodes:>9} {search.completedDepth:>3}"
+            moves.append(moveToString(bestMove))
+        print(f"{key:>4}{row}  {' '.join(moves)}")
+
+# prints root-parallel search time and nodes/sec on the keys positions for each
+# worker count, against Search.getBestMove, with how many of its moves match
+def benchmarkParallel(depth, workerCounts = (1, 2, 4, 8, 16), keys = "056"):
+    print(f"root-parallel search, depth {depth}, positions {keys}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'time':>8} {'nodes':>9} {'nodes/s':>9} {'speedup':>8} {'same move':>10}")
+    serialMoves, nodes = [], 0
+    # one search for every position, as ParallelSearch keeps one
+    search = Search()
+    startTime = time.perf_counter()
+    for key in keys:
+        serialMoves.append(search.getBestMove(getScenarioPosition(key), depth)[0])
+        nodes += search.nodes
+    serialTime = time.perf_counter() - startTime
+    print(f"{'serial':>8} {serialTime:>8.3f} {nodes:>9} {nodes / serialTime:>9.0f} "
+          f"{1:>7.2f}x {'':>10}")
+    for workers in workerCounts:
+        # (the constructor starts the worker processes)
+        parallelSearch = ParallelSearch(workers)
+        sameMoves, nodes = 0, 0
+        startTime = time.perf_counter()
+        for (key, serialMove) in zip(keys, serialMoves):
+            bestMove, score = parallelSearch.getBestMove(getScenarioPosition(key), depth)
+            sameMoves += bestMove == serialMove
+            nodes += parallelSearch.nodes
+        seconds = time.perf_counter() - startTime
+        parallelSearch.close()
+        print(f"{workers:>8} {seconds:>8.3f} {nodes:>9} {nodes / seconds:>9.0f} "
+              f"{serialTime / seconds:>7.2f}x {f'{sameMoves}/{len(keys)}':>10}")
+
+# prints root-parallel nodes and time with the main search and the workers
+# each keeping a transposition table of their own, and sharing one
+def benchmarkSharedTT(depth, workers = 4, sharedTTSizeMB = 16, keys = "056"):
+    print(f"shared transposition table, {workers} workers, depth {depth}")
+    print(f"{'key':>4} {'nodes own':>10} {'nodes shared':>13} {'time own':>9} {'time shared':>12}")
+    for key in keys:
+        position = getScenarioPosition(key)
+        row = []
+        for tableSize in (None, sharedTTSizeMB):
+            parallelSearch = ParallelSearch(workers, tableSize)
+            startTime = time.perf_counter()
+            parallelSearch.getBestMove(position, depth)
+            row.append((parallelSearch.nodes, time.perf_counter() - startTime))
+            parallelSearch.close()
+        print(f"{key:>4} {row[0][0]:>10} {row[1][0]:>13} {row[0][1]:>9.3f} {row[1][1]:>12.3f}")
+
+# prints the depth iterative deepening completes within timeLimit seconds
+def benchmarkIterativeDeepening(timeLimit):
+    print(f"iterative deepening, {timeLimit} s per move")
+    print(f"{'key':>4} {'depth':>6} {'nodes':>8} {'time':>7} {'score':>7}  pv")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        search = Search()
+        startTime = time.perf_counter()
+        bestMove, score = search.getBestMove(position, 64, timeLimit)
+        seconds = time.perf_counter() - startTime
+        pv = " ".join(moveToString(move) for move in search.pv)
+        print(f"{key:>4} {search.completedDepth:>6} {search.nodes:>8} "
+              f"{seconds:>7.3f} {score:>7}  {pv}")
+
+# (label, sliceNodes, sliceTime) for the time-sliced search comparison
+SLICE_QUOTAS = [
+    ("500 nodes", 500, None),
+    ("2000 nodes", 2000, None),
+    ("5 ms", None, 0.005),
+    ("20 ms", None, 0.02),
+]
+
+# prints how many slices a time-sliced search to depth takes under each quota
+# and the mean and worst time of one slice, checking the move matches getBestMove
+def benchmarkSlicedSearch(depth, keys = "056"):
+    print(f"time-sliced search, depth {depth}")
+    print(f"{'key':>4} {'quota':>11} {'slices':>7} {'mean ms':>8} {'max ms':>7} {'total':>7}  move")
+    for key in keys:
+        position = getScenarioPosition(key)
+        expectedMove, expectedScore = Search().getBestMove(position, depth)
+        for (label, sliceNodes, sliceTime) in SLICE_QUOTAS:
+            search = Search()
+            search.startSlicedSearch(position, depth, sliceNodes = sliceNodes,
+                                     sliceTime = sliceTime)
+            result = None
+            while result == None:
+                result = search.continueSlicedSearch()
+            latencies = search.sliceLatencies
+            meanMs = 1000 * sum(latencies) / len(latencies)
+            move = moveToString(result[0])
+            if result[0] != expectedMove:
+                move += f" (getBestMove: {moveToString(expectedMove)})"
+            print(f"{key:>4} {label:>11} {len(latencies):>7} {meanMs:>8.2f} "
+                  f"{1000 * max(latencies):>7.2f} {sum(latencies):>7.3f}  {move}")
+
+# prints the time of a book lookup on every position in the book's game
+# records, against a timeLimit second search of the same positions
+def benchmarkOpeningBook(timeLimit, maxPositions = 20):
+    book = OpeningBook(BOOK_PATH)
+    positions = []
+    with open(RECORDS_PATH) as recordsFile:
+        for line in recordsFile:
+            position = getStartPosition()
+            for text in line.split("#")[0].split():
+                positions.append(position.copy())
+                position.makeMove(nameToMove(position, text))
+    startTime = time.perf_counter()
+    found = sum(book.getMove(position) != None for position in positions)
+    lookupSeconds = (time.perf_counter() - startTime) / len(positions)
+    search = Search()
+    startTime = time.perf_counter()
+    for position in positions[:maxPositions]:
+        search.getBestMove(position, 64, timeLimit)
+    searchSeconds = (time.perf_counter() - startTime) / min(len(positions), maxPositions)
+    book.close()
+    print(f"opening book, {book.numRecords} records")
+    print(f"{found}/{len(positions)} positions found, "
+          f"{1e6 * lookupSeconds:.1f} us per lookup, {searchSeconds:.3f} s per search")
+
+# returns count random positions of signature with the strong side (white)
+# to move and winning, by the tablebase
+def getTablebasePositions(tablebase, signature, count, seed = 1):
+    rng = random.Random(seed)
+    pieceTypes = [KING, KING] + getSignaturePieces(signature)
+    positions = []
+    while len(positions) < count:
+        squares = rng.sample(range(64), len(pieceTypes))
+        position = Position()
+        for (idx, (pieceType, square)) in enumerate(zip(pieceTypes, squares)):
+            position.addPiece(BLACK if idx == 1 else WHITE, pieceType, square)
+        if (position.isChecked(BLACK) or position.getLegalMoves() == [] or
+            (KING_ATTACKS[squares[0]] >> squares[1]) & 1):
+            continue
+        if tablebase.probe(position) > MATE_BOUND:
+            positions.append(position)
+    return positions
+
+# prints, for random won positions of each tablebase, the time the tablebase
+# takes to answer and how often a timeLimit second search finds the mate
+def benchmarkTablebase(timeLimit, count = 10):
+    tablebase = Tablebase()
+    print(f"endgame tablebases, search limited to {timeLimit} s")
+    print(f"{'table':>6} {'probe ms':>9} {'mate plies':>11} {'search found':>13}")
+    for signature in tablebase.tables:
+        positions = getTablebasePositions(tablebase, signature, count)
+        startTime = time.perf_counter()
+        for position in positions:
+            tablebase.getBestMove(position)
+        probeSeconds = (time.perf_counter() - startTime) / count
+        plies = sum(MATE_SCORE - tablebase.probe(position) for position in positions) / count
+        found = 0
+        for position in positions:
+            bestMove, score = Search().getBestMove(position, 64, timeLimit)
+            found += score == tablebase.probe(position)
+        print(f"{signature:>6} {1000 * probeSeconds:>9.2f} {plies:>11.1f} "
+              f"{found:>9}/{count}")
+    tablebase.close()
+
+# returns the positions two plies below every scenario, the leaves of a
+# depth 2 search, in batches of siblings
+def getLeafBatches():
+    batches = []
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        for move in position.getLegalMoves():
+            position.makeMove(move)
+            batch = []
+            for reply in position.getLegalMoves():
+                position.makeMove(reply)
+                batch.append(position.copy())
+                position.unmakeMove(reply)
+            batches.append(batch)
+            position.unmakeMove(move)
+    return batches
+
+def getLeafPositions():
+    return [position for batch in getLeafBatches() for position in batch]
+
+# evaluate as it was before the incremental evaluation: counts material
+# from the bitboards and tests for check at every leaf
+def scanEvaluate(position):
+    score = position.getMaterial() * PAWN_SCORE
+    if position.sideToMove == BLACK:
+        score = -score
+    if position.isChecked(position.sideToMove):
+        score -= 15 * PAWN_SCORE
+    return score
+
+# prints the time per leaf of the material scan against the incremental
+# tapered evaluation
+def benchmarkEvaluation(repeats = 5):
+    positions = getLeafPositions()
+    print(f"leaf evaluation, {len(positions)} positions")
+    for (label, evaluateFn) in [("material scan", scanEvaluate), ("incremental", evaluate)]:
+        startTime = time.perf_counter()
+        for i in range(repeats):
+            for position in positions:
+                evaluateFn(position)
+        seconds = (time.perf_counter() - startTime) / (repeats * len(positions))
+        print(f"{label:>14} {1e6 * seconds:>7.2f} us per position")
+
+# prints positions per second for the scalar evaluations and for batches of
+# sibling leaves, then search times with and without batching at depth
+def benchmarkBatchEvaluation(depth, repeats = 5):
+    if chessBatchEvaluation.np == None:
+        print("batched evaluation: NumPy is not installed, skipped")
+        return
+    batches = getLeafBatches()
+    numPositions = sum(len(batch) for batch in batches)
+    print(f"batched evaluation, {len(batches)} batches of sibling leaves, "
+          f"{numPositions} positions")
+    evaluator = BatchEvaluator()
+    for (label, evaluateFn) in [("scalar", evaluate), ("scalar+mob", evaluateWithMobility),
+                                ("batch+mob", None)]:
+        startTime = time.perf_counter()
+        for i in range(repeats):
+            for batch in batches:
+                if evaluateFn == None:
+                    for position in batch:
+                        evaluator.add(position)
+                    evaluator.scoreBatch()
+                else:
+                    for position in batch:
+                        evaluateFn(position)
+        seconds = time.perf_counter() - startTime
+        print(f"{label:>11} {repeats * numPositions / seconds:>10.0f} positions/s")
+    print(f"{'key':>4} {'mob (s)':>8} {'batch (s)':>10} {'batched':>8} {'hits':>7}")
+    for key in SCENARIO_KEYS:
+        position = getScenarioPosition(key)
+        # the same evaluation, every position scored one at a time
+        unbatched = Search()
+        unbatched.evaluate = evaluateWithMobility
+        batched = Search(useBatchEvaluation = True)
+        unbatchedSeconds = timeSearch(unbatched, position, depth)[1]
+        batchedSeconds = timeSearch(batched, position, depth)[1]
+        print(f"{key:>4} {unbatchedSeconds:>8.3f} {batchedSeconds:>10.3f} "
+              f"{batched.batchedPositions:>8} {batched.batchHits:>7}")
+
+if __name__ == "__main__":
+    depth = 1
+    if len(sys.argv) > 1:
+        depth = int(sys.argv[1])
+    benchmarkBaselineSearch()
+    print()
+    benchmarkMakeUnmake(depth)
+    print()
+    benchmarkTranspositionTable(depth + 2)
+    print()
+    benchmarkMoveOrdering(depth + 3)
+    print()
+    benchmarkQuiescence(depth + 1)
+    print()
+    benchmarkPVS(depth + 4)
+    print()
+    benchmarkSearchConfigs("null move / LMR", SELECTIVE_CONFIGS, depth + 4, 1.0)
+    print()
+    benchmarkSearchConfigs("futility / razoring", FORWARD_PRUNING_CONFIGS, depth + 5, 1.0)
+    print()
+    benchmarkSearchConfigs("static exchange evaluation", SEE_CONFIGS, depth + 5, 1.0)
+    print()
+    benchmarkParallel(depth + 3)
+    print()
+    benchmarkSharedTT(depth + 3)
+    print()
+    benchmarkSlicedSearch(depth + 5)
+    print()
+    benchmarkOpeningBook(1.0)
+    print()
+    benchmarkTablebase(1.0)
+    print()
+    benchmarkEvaluation()
+    print()
+    benchmarkBatchEvaluation(depth + 4)
+    print()
+    benchmarkIterativeDeepening(1.0)
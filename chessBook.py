@@ -0,0 +1,145 @@
+#################################################
+# chessBook.py
+#
+# Opening book: weighted moves keyed by position hash, kept in a sorted
+# binary file that is memory-mapped and binary-searched at run time
+#################################################
+
+import mmap
+import os
+import random
+import struct
+import sys
+from chessPosition import getStartPosition, rowColToSquare, moveFrom, moveTo
+
+# files written by buildBook and the game records they are built from
+BOOK_PATH = "chessBook.bin"
+RECORDS_PATH = "chessOpenings.txt"
+
+# one record per (position, move): the position's 64-bit hash, the move and
+# how often the games played it; big-endian, so records sort the same as
+# their hashes
+BOOK_RECORD = struct.Struct(">QHH")
+BOOK_KEY = struct.Struct(">Q")
+MAX_WEIGHT = (1 << 16) - 1
+
+# only the first BOOK_MAX_PLY moves of each game go into the book
+BOOK_MAX_PLY = 20
+
+########################
+# MOVE NOTATION
+########################
+
+# square names as seen from white: files a-h are cols 0-7, rank 1 is row 7
+def squareToName(square):
+    row, col = square >> 3, square & 7
+    return "abcdefgh"[col] + str(8 - row)
+
+def nameToSquare(name):
+    if (len(name) != 2 or name[0] not in "abcdefgh" or
+        name[1] not in "12345678"):
+        return None
+    return rowColToSquare(8 - int(name[1]), "abcdefgh".index(name[0]))
+
+def moveToName(move):
+    return squareToName(moveFrom(move)) + squareToName(moveTo(move))
+
+# returns the legal move in position written as text ("e2e4"), or None
+def nameToMove(position, text):
+    fromSquare, toSquare = nameToSquare(text[:2]), nameToSquare(text[2:4])
+    for move in position.getLegalMoves():
+        if moveFrom(move) == fromSquare and moveTo(move) == toSquare:
+            return move
+    return None
+
+########################
+# BUILDING
+########################
+
+# counts how often each (hash, move) is played over the first maxPly moves
+# of the games in lines (one game per line, "#" starts a comment), replaying
+# each game from the start position; raises ValueError on an illegal move
+def countBookMoves(lines, maxPly = BOOK_MAX_PLY):
+    counts = {}
+    for (lineNumber, line) in enumerate(lines, 1):
+        position = getStartPosition()
+        for text in line.split("#")[0].split()[:maxPly]:
+            move = nameToMove(position, text)
+            if move == None:
+                raise ValueError(f"line {lineNumber}: {text} is not a legal move")
+            key = (position.getHash(), move)
+            counts[key] = counts.get(key, 0) + 1
+            position.makeMove(move)
+    return counts
+
+# builds the book at bookPath from the game records at recordsPath and
+# returns how many records it has
+def buildBook(recordsPath = RECORDS_PATH, bookPath = BOOK_PATH, maxPly = BOOK_MAX_PLY):
+    with open(recordsPath) as recordsFile:
+        counts = countBookMoves(recordsFile, maxPly)
+    with open(bookPath, "wb") as bookFile:
+        for ((hash, move), count) in sorted(counts.items()):
+            bookFile.write(BOOK_RECORD.pack(hash, move, min(count, MAX_WEIGHT)))
+    return len(counts)
+
+########################
+# LOOKUP
+########################
+
+class OpeningBook(object):
+    def __init__(self, path = BOOK_PATH):
+        self.file = open(path, "rb")
+        self.numRecords = os.fstat(self.file.fileno()).st_size // BOOK_RECORD.size
+        # an empty file cannot be mapped, but then there is nothing to find
+        self.data = None
+        if self.numRecords > 0:
+            self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def getKey(self, idx):
+        return BOOK_KEY.unpack_from(self.data, idx * BOOK_RECORD.size)[0]
+
+    # returns [(move, weight)] for every record of position's hash, found by
+    # binary search so only the pages it touches are read from disk
+    def getMoves(self, position):
+        hash = position.getHash()
+        lo, hi = 0, self.numRecords
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.getKey(mid) < hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        moves = []
+        for idx in range(lo, self.numRecords):
+            key, move, weight = BOOK_RECORD.unpack_from(self.data, idx * BOOK_RECORD.size)
+            if key != hash:
+                break
+            moves.append((move, weight))
+        return moves
+
+    # returns a book move for position picked at random by weight, or None if
+    # the book does not have the position; moves that are not legal there
+    # (from a hash collision) are skipped
+    def getMove(self, position, rng = random):
+        moves = self.getMoves(position)
+        if moves == []:
+            return None
+        legalMoves = position.getLegalMoves()
+        moves = [(move, weight) for (move, weight) in moves if move in legalMoves]
+        if moves == []:
+            return None
+        return rng.choices([move for (move, weight) in moves],
+                           [weight for (move, weight) in moves])[0]
+
+    def close(self):
+        if self.data != None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+# builds the book: python chessBook.py [recordsPath] [bookPath]
+if __name__ == "__main__":
+    recordsPath = sys.argv[1] if len(sys.argv) > 1 else RECORDS_PATH
+    bookPath = sys.argv[2] if len(sys.argv) > 2 else BOOK_PATH
+    numRecords = buildBook(recordsPath, bookPath)
+    print(f"wrote {numRecords} records to {bookPath}")
@@ -6,9 +6,19 @@
 #################################################
 
 from cmu_112_graphics import *
-import math
-import copy
 import random
+import os
+import threading
+from chessPosition import (Position, WHITE, BLACK, COLOR_NAMES, PIECE_LETTERS,
+                           PIECE_NAMES, getCastleRight, getStartPosition,
+                           rowColToSquare, squareToRowCol, moveFrom, moveTo,
+                           iterSquares)
+from chessAttacks import BETWEEN
+from chessScenarios import SCENARIO_PIECES, SCENARIO_MOVES, getScenarioPosition
+from chessSearch import Search, INFINITY
+from chessParallel import ParallelSearch
+from chessBook import OpeningBook, BOOK_PATH
+from chessTablebase import Tablebase
 
 #################################################
 # CHESS PIECE CLASSES
@@ -41,6 +51,10 @@ class ChessPiece(object):
 
 # Pawn class (subclass of ChessPiece)   
 class Pawn(ChessPiece):
+    # take offsets are shared; posMoves stays per pawn since its double move is removed
+    colorTakeMoves = {"white": frozenset({(-1, -1), (-1, 1)}),
+                      "black": frozenset({(1, -1), (1, 1)})}
+
     def __init__(self, row, col, color, moved = False, posMoves = set(), takeMoves = set()):
         super().__init__(row, col, color, moved, posMoves, takeMoves)
 
@@ -49,13 +63,12 @@ class Pawn(ChessPiece):
                 self.posMoves = {(-1, 0)}
             else:
                 self.posMoves = {(-1, 0), (-2, 0)}
-            self.takeMoves = {(-1, -1), (-1, 1)}
         else: # self.color == "black"
             if moved:
                 self.posMoves = {(1, 0)}
             else:
                 self.posMoves = {(1, 0), (2, 0)}
-            self.takeMoves = {(1, -1), (1, 1)}
+        self.takeMoves = Pawn.colorTakeMoves[self.color]
         
         self.value = 1
 
@@ -102,16 +115,13 @@ class Knight(ChessPiece):
                 if abs(drow) == abs(dcol):
                     continue
                 moves.add((drow, dcol))
+    moves = frozenset(moves)
 
     def __init__(self, row, col, color, moved = False, posMoves = set(), takeMoves = set()):
         super().__init__(row, col, color, moved, posMoves, takeMoves)
 
-        for drow in {-2, -1, 1, 2}:
-            for dcol in {-2, -1, 1, 2}:
-                if abs(drow) == abs(dcol):
-                    continue
-                self.posMoves.add((drow, dcol))
-        self.takeMoves = self.posMoves
+        self.posMoves = Knight.moves
+        self.takeMoves = Knight.moves
 
         self.value = 3
 
@@ -121,24 +131,21 @@ class Knight(ChessPiece):
 # King class (subclass of ChessPiece)
 class King(ChessPiece):
     castleMoves = {(0, -2), (0, 2)}
+    moves = frozenset((r, c) for r in {-1, 0, 1} for c in {-1, 0, 1}
+                      if (r, c) != (0, 0))
 
     def __init__(self, row, col, color, moved = False, posMoves = set(), takeMoves = set()):
         super().__init__(row, col, color, moved, posMoves, takeMoves)
 
         if self.posMoves == set():
-            for r in {-1, 0, 1}:
-                for c in {-1, 0, 1}:
-                    if (r, c) != (0, 0):
-                        self.posMoves.add((r, c))
+            self.posMoves = King.moves
 
+        # unmoved kings get their own set since castle moves are removed from it
         if moved == False:
-            self.posMoves = self.posMoves.union(King.castleMoves)
+            self.posMoves = set(self.posMoves).union(King.castleMoves)
 
         if self.takeMoves == set():
-            for r in {-1, 0, 1}:
-                for c in {-1, 0, 1}:
-                    if (r, c) != (0, 0):
-                        self.takeMoves.add((r, c))
+            self.takeMoves = King.moves
 
         self.value = 50
 
@@ -242,6 +249,10 @@ def homeScreenMode_redrawAll(app, canvas):
         canvas.create_image(125, 450, image= ImageTk.PhotoImage(app.frogImg))
         canvas.create_text(app.width / 2, app.height * (3/4), text = "graphic design is my passion",
                         font = (app.font,  25))
+
+# app stopped function for homeScreenMode
+def homeScreenMode_appStopped(app):
+    stopAI(app)
     
 
 #################################################
@@ -256,20 +267,35 @@ def homeScreenMode_redrawAll(app, canvas):
 def aiMode_timerFired(app):
     if app.gameOver or app.paused:
         return
-    # tests to see if it's computer's turn
+    # tests to see if it's computer's turn; the search runs in a background
+    # thread, so this only starts it and then polls until it is done
     if app.playerToMoveIdx % 2 == 1:
-        gameBoardCopy = copyGameBoard(app, app.gameBoard)
-        whiteCopy = copyPieces(app, app.whitePieces)
-        blackCopy = copyPieces(app, app.blackPieces)
-        bestPiece, bestMove = aiMode_getMinimaxBestMove(app, whiteCopy, 
-                                                blackCopy,
-                                                gameBoardCopy)
-        app.activePiece = bestPiece
-        row, col = bestMove[0], bestMove[1]
-        if isinstance(app.gameBoard[row][col], int):
-            makeMove(app, row, col)
-        else: # take move
-            takePiece(app, row, col)
+        if aiMode_isCancelledSearchRunning(app):
+            return
+        elif app.aiUseSlicedSearch:
+            aiMode_continueSlicedSearch(app)
+        elif app.aiIsPondering:
+            aiMode_stopPondering(app)
+        elif app.aiThread == None:
+            aiMode_startSearch(app)
+        elif not app.aiThread.is_alive():
+            bestMove = app.aiResult
+            app.aiThread = None
+            aiMode_playSearchResult(app, bestMove)
+
+# plays the move the AI search found, or sets stalemate if there was none
+def aiMode_playSearchResult(app, bestMove):
+    # no legal moves without being checked
+    if bestMove == None:
+        app.stalemate = True
+        cancelAISearch(app)
+        return
+    aiMode_playMove(app, bestMove)
+    aiMode_startPondering(app)
+
+# app stopped function for aiMode
+def aiMode_appStopped(app):
+    stopAI(app)
 
 # function runs when mouse is moved in aiMode
 def aiMode_mouseMoved(app, event):    
@@ -346,15 +372,16 @@ def aiMode_mousePressed(app, event):
             app.paused = False
         return
     
-    # assuming player is always white, stops mouse pressed if it's not white's turn
-    if app.playerToMoveIdx % 2 != 0:
-        return
-
-    # if x, y within pause button bounds
+    # if x, y within pause button bounds (pausing stops the AI's search)
     if (x > app.pauseX and y > app.pauseY 
         and x < app.pauseX + app.pauseWidth 
         and y < app.pauseY + app.pauseWidth):
         app.paused = True
+        cancelAISearch(app)
+        return
+
+    # assuming player is always white, stops mouse pressed if it's not white's turn
+    if app.playerToMoveIdx % 2 != 0:
         return
     
     if inBoard(app, x, y) == False:
@@ -394,570 +421,146 @@ def aiMode_mousePressed(app, event):
 # AI HELPER FUNCTIONS
 ######################## 
 
-def aiMode_isStalemate(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn):
-    color = aiMode_getPlayerColor(isMaxPlayerTurn)
-    king = eval(f"{color}Pieces['K'].pop()")
-    eval(f"{color}Pieces['K'].add(king)")
-    numPieces = getNumberOfPieces(app, eval(f"{color}Pieces"))
-    kingMoves = aiMode_getValidMoves(app, whitePieces, blackPieces, gameBoard, king)
-    kingTakes = aiMode_getValidTakes(app, whitePieces, blackPieces, gameBoard, king)
-    totalPosMoves = kingMoves.union(kingTakes)
-    if numPieces == 1 and len(totalPosMoves) == 0:
-        return True
-    return False
-
-# returns True if proposed move is a valid move for piece
-def aiMode_isValidMove(app, whitePieces, blackPieces, gameBoard, piece, moveLoc):
-    moveRow, moveCol = moveLoc[0], moveLoc[1]
-
-    if rowColInBounds(app, moveRow, moveCol) == False:
-        return False
-
-    moveSquare = gameBoard[moveRow][moveCol]
-    if (isinstance(moveSquare, ChessPiece)):
-        return False
-
-    currRow, currCol = piece.row, piece.col
-    dRow, dCol = (moveRow - currRow), (moveCol - currCol)
-
-    if ((dRow, dCol) not in piece.posMoves
-        or rowColInBounds(app, moveRow, moveCol) == False):
-        return False
-    kingChecked = aiMode_isChecked(app, whitePieces, blackPieces, gameBoard, piece.color == "white")
-    if type(piece) == King and kingChecked and (dRow, dCol) in King.castleMoves:
-        return False
-        
-    hasNoBlockingPieces = aiMode_checkBlockingPieces(app, gameBoard, piece, moveLoc)
-    isStillChecked = aiMode_attemptUndoCheck(app, whitePieces, blackPieces, gameBoard, piece, moveLoc)
-    if hasNoBlockingPieces and isStillChecked:
-        if type(piece) == King and (dRow, dCol) in King.castleMoves:
-            castleDCol = dCol
-            rookSearchDCol = abs(castleDCol) // castleDCol
-            newKingRow, newKingCol = piece.row + dRow, piece.col + dCol
-            tempRow, tempCol = newKingRow, newKingCol + rookSearchDCol
-            rook = None
-
-            # find rook
-            while rowColInBounds(app, tempRow, tempCol):
-                if type(gameBoard[tempRow][tempCol]) == Rook:
-                    rook = gameBoard[tempRow][tempCol]
-                    for item in eval(f"{rook.color}Pieces['R']"):
-                        if (item.row, item.col) == (rook.row, rook.col):
-                            return True
-                            
-                elif isinstance(gameBoard[tempRow][tempCol], ChessPiece):
-                    return False
-        
-                tempCol += rookSearchDCol
-        return True
-    else:
-        return False
-
-# returns True if proposed move is a valid take move for piece
-def aiMode_isValidTake(app, whitePieces, blackPieces, gameBoard, piece, moveLoc):
-    takeRow, takeCol = moveLoc[0], moveLoc[1]
-
-    if rowColInBounds(app, takeRow, takeCol) == False:
-        return False
-
-    # check if takeRow, takeCol is a ChessPiece of opposite color to piece
-    takeSquare = gameBoard[takeRow][takeCol]
-    if (isinstance(takeSquare, ChessPiece) == False):
-        return False
-    elif (isinstance(takeSquare, ChessPiece) and 
-          takeSquare.color == piece.color):
-        return False
-    currRow, currCol = piece.row, piece.col
-    dRow, dCol = (takeRow - currRow), (takeCol - currCol)
-
-    if (dRow, dCol) not in piece.takeMoves:
-        return False
-    
-    hasNoBlockingPieces = aiMode_checkBlockingPieces(app, gameBoard, piece, moveLoc)
-    if hasNoBlockingPieces:
-        isChecked = aiMode_attemptUndoCheck(app, whitePieces, blackPieces, gameBoard, piece, moveLoc)
-        return hasNoBlockingPieces and isChecked
-    else:
-        return False
-
-# returns new piece and board state after moving piece to moveLoc
-def aiMode_makeMove(app, whitePieces, blackPieces, gameBoard, piece, moveLoc):
-    oldRow, oldCol = piece.row, piece.col
-    if aiMode_isValidMove(app, whitePieces, blackPieces, gameBoard, piece, moveLoc):
-        row, col = moveLoc[0], moveLoc[1]
-        gameBoard[oldRow][oldCol] = 0
-
-        oldMovedState = piece.moved
-        piece.moved = True
-
-        dRow, dCol = row - piece.row, col - piece.col
-        
-        if type(piece) == King and (dRow, dCol) in King.castleMoves:
-            castleDCol = dCol
-
-            rookSearchDCol = abs(castleDCol) // castleDCol
-            newKingRow, newKingCol = piece.row + dRow, piece.col + dCol
-            tempRow, tempCol = newKingRow, newKingCol + rookSearchDCol
-            rook = None
-
-            # find rook
-            while rook == None and rowColInBounds(app, tempRow, tempCol):
-                if type(gameBoard[tempRow][tempCol]) == Rook:
-                    rook = gameBoard[tempRow][tempCol]
-                    for item in eval(f"{rook.color}Pieces['R']"):
-                        if (item.row, item.col) == (rook.row, rook.col):
-                            rook = item
-                            gameBoard[tempRow][tempCol] = 0
-                            break
-            
-                tempCol += rookSearchDCol
-
-            rookDMove = rookSearchDCol * (-1)
-            eval(f"{rook.color}Pieces['R'].remove(rook)")
-
-            rook.col = newKingCol + rookDMove
-            rook.moved = True
-            gameBoard[rook.row][rook.col] = rook
-            eval(f"{rook.color}Pieces['R'].add(rook)")
-        piece = findPiece(app, piece, eval(f"{piece.color}Pieces"))
-        eval(f"{piece.color}Pieces[str(piece)].remove(piece)")
-
-        # removes pawn double-move/castle move if piece is a pawn/king or rook respectively
-        if oldMovedState != True and type(piece) == Pawn:
-            if piece.color == "white":
-                piece.posMoves.remove((-2, 0))
-            else:
-                piece.posMoves.remove((2, 0))
-        elif oldMovedState != True and type(piece) == King:
-            for move in King.castleMoves:
-                if move in piece.posMoves:
-                    piece.posMoves.remove(move)
-        elif oldMovedState != True and type(piece) == Rook:
-            color = piece.color
-            king = eval(f"{color}Pieces['K'].pop()")
-            if king.moved == False:
-                dRow, dCol = piece.row - king.row, piece.col - king.col
-                dRow, dCol = dRow, (abs(dCol) // dCol) * 2
-                king.posMoves.remove((dRow, dCol))
-            eval(f"{color}Pieces['K'].add(king)")
-
-        piece.row, piece.col = row, col
-
-        gameBoard[row][col] = piece
-        eval(f"{piece.color}Pieces[str(piece)].add(piece)")
-
-    return (whitePieces, blackPieces, gameBoard)
-
-# returns new piece and board state after taking piece at takeLoc
-def aiMode_takePiece(app, whitePieces, blackPieces, gameBoard, piece, takeLoc):
-    oldRow, oldCol = piece.row, piece.col
-
-    if aiMode_isValidTake(app, whitePieces, blackPieces, gameBoard, piece, takeLoc):
-        row, col = takeLoc[0], takeLoc[1]
-        gameBoard[oldRow][oldCol] = 0
-        piece = findPiece(app, piece, eval(f"{piece.color}Pieces"))
-        eval(f"{piece.color}Pieces[str(piece)].remove(piece)")
-
-        oldMovedState = piece.moved
-        piece.moved = True
-        
-        # removes pawn double-move/castle move if piece is a pawn/king or rook respectively
-        if oldMovedState != True and type(piece) == Pawn:
-            if piece.color == "white":
-                piece.posMoves.remove((-2, 0))
-            else:
-                piece.posMoves.remove((2, 0))
-        elif oldMovedState != True and type(piece) == King:
-            for move in King.castleMoves:
-                if move in piece.posMoves:
-                    piece.posMoves.remove(move)
-        elif oldMovedState != True and type(piece) == Rook:
-            color = piece.color
-            king = eval(f"{color}Pieces['K'].pop()")
-            if king.moved == False:
-                dRow, dCol = piece.row - king.row, piece.col - king.col
-                dRow, dCol = dRow, (abs(dCol) // dCol) * 2
-                king.posMoves.remove((dRow, dCol))
-            eval(f"{color}Pieces['K'].add(king)")
-            
-        takenPiece = gameBoard[row][col]
-        # print(f"Taken Piece: {takenPiece} {takenPiece.row} {takenPiece.col}, {hash(takenPiece)}")
-        # print(eval(f"{takenPiece.color}Pieces[str(takenPiece)]"))
-        # print(f"{gameBoard}")
-        for item in eval(f"{takenPiece.color}Pieces[str(takenPiece)]"):
-            # print(f"item: {item} {item.row} {item.col}")
-            # print(hash(item))
-            if (item.row, item.col, item.moved) == (takenPiece.row, takenPiece.col, takenPiece.moved):
-                # print("changing takenPiece value!")
-                takenPiece = item
-                break
-        # print(hash(takenPiece), takenPiece in eval(f"{takenPiece.color}Pieces[str(takenPiece)]"))
-        eval(f"{takenPiece.color}Pieces[str(takenPiece)].remove(takenPiece)")
-
-        piece.row, piece.col = row, col
-        gameBoard[row][col] = piece
-        eval(f"{piece.color}Pieces[str(piece)].add(piece)")
-
-    return (whitePieces, blackPieces, gameBoard)
-
-# returns all moves for current player in minimax node state
-def aiMode_getMovesFromState(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn):
-    if isMaxPlayerTurn: # white's turn
-        whiteMoves = set()
-
-        for pieceType in whitePieces:
-            for piece in whitePieces[pieceType]:
-                for (dRow, dCol) in piece.posMoves.union(piece.takeMoves):
-                    moveRow, moveCol = piece.row + dRow, piece.col + dCol
-                    if (aiMode_isValidMove(app, whitePieces, blackPieces, gameBoard,
-                                          piece, (moveRow, moveCol))
-                        or aiMode_isValidTake(app, whitePieces, blackPieces, gameBoard,
-                                              piece, (moveRow, moveCol))):
-                        whiteMoves.add((piece, (moveRow, moveCol)))
-        return whiteMoves
-    else:
-        blackMoves = set()
-        for pieceType in blackPieces:
-            for piece in blackPieces[pieceType]:
-                for (dRow, dCol) in piece.posMoves.union(piece.takeMoves):
-                    moveRow, moveCol = piece.row + dRow, piece.col + dCol
-                    isValidMove = aiMode_isValidMove(app, whitePieces, blackPieces, gameBoard,
-                                          piece, (moveRow, moveCol))
-                    isValidTake = aiMode_isValidTake(app, whitePieces, blackPieces, gameBoard,
-                                              piece, (moveRow, moveCol))
-
-                    if (isValidMove or isValidTake):
-                        blackMoves.add((piece, (moveRow, moveCol)))
-        return blackMoves
-
-# return True if there are pieces blocking piece from moveLoc in minimax node state
-def aiMode_checkBlockingPieces(app, gameBoard, piece, moveLoc):
-    moveRow, moveCol = moveLoc[0], moveLoc[1]
-    currRow, currCol = piece.row, piece.col 
-    dRow, dCol = (moveRow - currRow), (moveCol - currCol)
-
-    if type(piece) != Knight:
-        dist = math.sqrt(dRow ** 2 + dCol ** 2)
-        unitDRow, unitDCol = math.ceil(dRow / dist), math.ceil(dCol / dist)
-        if dRow / dist < 0:
-            unitDRow = -math.ceil(abs(dRow/dist))
-        if dCol / dist < 0:
-            unitDCol = -math.ceil(abs(dCol/dist))
-        tempRow, tempCol =  currRow + unitDRow, currCol + unitDCol
-
-        while (tempRow != moveRow) or (tempCol != moveCol):
-            tempPiece = gameBoard[tempRow][tempCol]
-            if (isinstance(tempPiece, ChessPiece) and
-                tempPiece.color == piece.color):
-                return False
-            elif (isinstance(tempPiece, ChessPiece) and
-                  tempPiece.color != piece.color and
-                  (tempRow != moveRow or tempCol != moveCol)):
-                return False
-
-            tempRow += unitDRow
-            tempCol += unitDCol
-    return True
-
-# returns True if move does not result in check in minimax node state
-def aiMode_attemptUndoCheck(app, whitePieces, blackPieces, gameBoard, piece, moveLoc):
-    tempRow, tempCol = moveLoc[0], moveLoc[1]
-    tempBoardSq = gameBoard[tempRow][tempCol]
-    if isinstance(tempBoardSq, ChessPiece) and tempBoardSq.color == piece.color:
-        return False
-
-    oppColor = getOpposingColor(app, piece)
-    color = piece.color
-    pieceCopy = piece.copy()
-    whitePiecesCopy = copyPieces(app, whitePieces)
-    blackPiecesCopy = copyPieces(app, blackPieces)
-    gameBoardCopy = copyGameBoard(app, gameBoard)
-
-    dRow, dCol = tempRow - piece.row, tempCol - piece.col
-
-    if isinstance(tempBoardSq, ChessPiece) and (tempBoardSq.color != piece.color):
-        oppColorPiece = tempBoardSq.copy()
-
-        if pieceCopy.hasTake(dRow, dCol):
-            for item in eval(f"{oppColor}PiecesCopy[str(oppColorPiece)]"):
-                if (item.row, item.col) == (oppColorPiece.row, oppColorPiece.col):
-                    oppColorPiece = item
-                    eval(f"{oppColor}PiecesCopy[str(oppColorPiece)].remove(oppColorPiece)")
-                    break
-
-            for item in eval(f"{color}PiecesCopy[str(piece)]"):
-                if (item.row, item.col) == (piece.row, piece.col):
-                    pieceCopy = item
-                    eval(f"{color}PiecesCopy[str(piece)].remove(pieceCopy)")
-                    break
-
-            gameBoardCopy[tempRow][tempCol] = piece
-            gameBoardCopy[piece.row][piece.col] = 0
-
-            pieceCopy.row, pieceCopy.col = tempRow, tempCol
-            eval(f"{color}PiecesCopy[str(pieceCopy)].add(pieceCopy)")
-
-            result = None
-            if aiMode_isChecked(app, whitePiecesCopy, blackPiecesCopy, 
-                                gameBoardCopy, piece.color == "white"):
-                result = False
-            else:
-                result = True
-            return result
-    else:
-        if pieceCopy.hasMove(dRow, dCol): 
-            gameBoardCopy[tempRow][tempCol] = piece
-            gameBoardCopy[piece.row][piece.col] = 0
-
-            for item in eval(f"{pieceCopy.color}PiecesCopy[str(pieceCopy)]"):
-                if (item.row, item.col, item.moved) == (pieceCopy.row, pieceCopy.col, pieceCopy.moved):
-                    pieceCopy = item
-                    eval(f"{color}PiecesCopy[str(piece)].remove(pieceCopy)")
-                    break
-
-            pieceCopy.row, pieceCopy.col = tempRow, tempCol
-            eval(f"{color}PiecesCopy[str(pieceCopy)].add(pieceCopy)")
-            result = None
-            if aiMode_isChecked(app, whitePiecesCopy, blackPiecesCopy, 
-                                gameBoardCopy, pieceCopy.color == "white"):
-                result = False
-            else:
-                result = True
-
-            return result
-    return False
-
-# returns True if color is checked in minimax node state
-def aiMode_isChecked(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn):
-    color = aiMode_getPlayerColor(isMaxPlayerTurn)
-    king = eval(f"{color}Pieces['K'].pop()")
-    eval(f"{color}Pieces['K'].add(king)")
-    oppColor = None
-    if color == "white":
-        oppColor = "black"
-    else:
-        oppColor = "white"
-
-    for knight in eval(f"{oppColor}Pieces['N']"):
-        (dRow, dCol) = (king.row - knight.row, king.col - knight.col)
-        if (dRow, dCol) in knight.takeMoves:
-            return True
-    
-    for key in {'P','B','R','Q','K'}:
-        for piece in eval(f"{oppColor}Pieces[key]"):
-            (dRow, dCol) = (king.row - piece.row, king.col - piece.col)
-            if ((dRow, dCol) in piece.takeMoves and 
-                aiMode_checkBlockingPieces(app, gameBoard, piece, (king.row, king.col))):
-                return True
-    return False
-
-# returns set of valid moves for given piece in minimax node state
-def aiMode_getValidMoves(app, whitePieces, blackPieces, gameBoard, piece):
-    posMoves = piece.posMoves
-    currRow, currCol = piece.row, piece.col
-    validMoves = set()
-    for (dRow, dCol) in posMoves:
-        moveRow, moveCol = currRow + dRow, currCol + dCol
-        moveLoc = (moveRow, moveCol)
-        if (aiMode_isValidMove(app, whitePieces, blackPieces, 
-                               gameBoard, piece, moveLoc)):
-            validMoves.add((moveRow, moveCol))
-    return validMoves
-
-# returns set of valid take moves for given piece in minimax node state
-def aiMode_getValidTakes(app, whitePieces, blackPieces, gameBoard, piece):
-    posTakes = piece.takeMoves
-    currRow, currCol = piece.row, piece.col
-    validTakes = set()
-    for (dRow, dCol) in posTakes:
-        moveRow, moveCol = currRow + dRow, currCol + dCol
-        moveLoc = (moveRow, moveCol)
-        if (aiMode_isValidTake(app, whitePieces, blackPieces, 
-                               gameBoard, piece, moveLoc)):
-            validTakes.add((moveRow, moveCol))
-    return validTakes
-
-# returns True if the active player is mated in minimax node state
-def aiMode_isMated(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn):
-    color = aiMode_getPlayerColor(isMaxPlayerTurn)
-
-    for pieceType in eval(f"{color}Pieces"):
-        for piece in eval(f"{color}Pieces[pieceType]"):
-            validMoves = aiMode_getValidMoves(app, whitePieces, blackPieces,
-                                              gameBoard, piece)
-            validTakes = aiMode_getValidTakes(app, whitePieces, blackPieces,
-                                              gameBoard, piece)
-            if (validMoves != set() or validTakes != set()):
-                return False
-    return True
-
-# returns current player color depending on isMaxPlayerTurn value
-def aiMode_getPlayerColor(isMaxPlayerTurn):
-    if isMaxPlayerTurn:
-        return "white"
-    else:
-        return "black"
+# returns all legal moves for the side to move in minimax node state
+def aiMode_getMovesFromState(app, position):
+    return position.getLegalMoves()
 
 ########################
 # AI FUNCTIONS
 ######################## 
 
-# wrapper function for minimax function, returns best move for AI
+# wrapper function for the search (or the opening book), returns best move for AI
 def aiMode_getMinimaxBestMove(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn = False):
-    bestPiece = None
-    bestMove = None
-    minVal = None
-    posMoves = aiMode_getMovesFromState(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn)
-    for (piece, moveLoc) in posMoves:
-        moveRow, moveCol = moveLoc[0], moveLoc[1]
-        depth = 1
-        pieceCopy = None
-        whiteCopy = dict()
-        for key in whitePieces:
-            whiteCopy[key] = whiteCopy.get(key, set())
-            for item in whitePieces[key]:
-                itemCopy = item.copy()
-                whiteCopy[key].add(itemCopy)
-                if (item.color, item.row, item.col, item.moved) == (piece.color, piece.row, piece.col, piece.moved):
-                    pieceCopy = itemCopy
-
-        blackCopy = dict()
-        for key in blackPieces:
-            blackCopy[key] = blackCopy.get(key, set())
-            for item in blackPieces[key]:
-                itemCopy = item.copy()
-                blackCopy[key].add(itemCopy)
-                if (item.color, item.row, item.col, item.moved) == (piece.color, piece.row, piece.col, item.moved):
-                    pieceCopy = itemCopy
-
-        gameBoardCopy = copyGameBoard(app, gameBoard)
-
-        if aiMode_isValidMove(app, whiteCopy, blackCopy, gameBoardCopy,
-                              pieceCopy, moveLoc):
-            aiMode_makeMove(app, whiteCopy, blackCopy, gameBoardCopy,
-                            pieceCopy, moveLoc)
-        else: # isValidTake == True
-            aiMode_takePiece(app, whiteCopy, blackCopy, gameBoardCopy,
-                             pieceCopy, moveLoc)
-        moveVal = aiMode_minimax(app, whiteCopy, blackCopy, gameBoardCopy, depth, True)
-        if bestMove == None or moveVal < minVal:
-            minVal = moveVal
-            bestPiece = piece
-            bestMove = (moveRow, moveCol)
-    return bestPiece, bestMove
+    position = getPositionFromPieces(app, whitePieces, blackPieces, isMaxPlayerTurn)
+    bestMove = aiMode_getBestMoveFromPosition(app, position)
+    if bestMove == None:
+        return None, None
+    fromRow, fromCol = squareToRowCol(moveFrom(bestMove))
+    return gameBoard[fromRow][fromCol], squareToRowCol(moveTo(bestMove))
+
+# returns the AI's move (encoded, see chessPosition.py) in position, or None
+# if the side to move has no legal moves
+def aiMode_getBestMoveFromPosition(app, position):
+    bookMove = aiMode_getBookMove(app, position)
+    if bookMove != None:
+        return bookMove
+    if app.aiWorkers > 1:
+        bestMove, bestVal = app.parallelSearch.getBestMove(position, app.aiParallelDepth)
+    else:
+        bestMove, bestVal = app.aiSearch.getBestMove(position, app.aiMaxDepth,
+                                                     app.aiTimeLimit, app.aiNodeLimit)
+    return bestMove
+
+# returns a move from the opening book for position, or None if the book
+# does not have it; the search's principal variation is cleared, since it
+# no longer predicts the game (see aiMode_startPondering)
+def aiMode_getBookMove(app, position):
+    if app.openingBook == None:
+        return None
+    bookMove = app.openingBook.getMove(position)
+    if bookMove != None:
+        app.aiSearch.pv = []
+    return bookMove
+
+# starts searching for black's move in a background thread; the thread only
+# sees its own copy of the position and only writes app.aiResult
+def aiMode_startSearch(app):
+    position = getPositionFromPieces(app, app.whitePieces, app.blackPieces, False)
+    app.aiSearch.isCancelled = False
+    app.parallelSearch.isCancelled = False
+    app.aiResult = None
+    app.aiThread = threading.Thread(target = aiMode_runSearch, args = (app, position),
+                                    daemon = True)
+    app.aiThread.start()
+
+# a cancelled search thread still uses app.aiSearch (and app.aiResult) until
+# it stops, so no new search starts before then
+def aiMode_isCancelledSearchRunning(app):
+    if app.aiCancelledThread != None and not app.aiCancelledThread.is_alive():
+        app.aiCancelledThread = None
+    return app.aiCancelledThread != None
+
+# body of the search thread
+def aiMode_runSearch(app, position):
+    app.aiResult = aiMode_getBestMoveFromPosition(app, position)
+
+# after the AI moves, searches the position after the player's predicted
+# reply (the second move of the AI's principal variation) in the background
+# thread until the player moves, filling the transposition table
+def aiMode_startPondering(app):
+    pv = app.aiSearch.pv
+    if (not app.aiPonder or app.aiUseSlicedSearch or app.aiWorkers > 1 or
+        app.gameOver or app.stalemate or len(pv) < 2 or
+        aiMode_isCancelledSearchRunning(app)):
+        return
+    position = getPositionFromPieces(app, app.whitePieces, app.blackPieces, True)
+    if pv[1] not in position.getLegalMoves():
+        return
+    position.makeMove(pv[1])
+    app.aiPonderHash = position.getHash()
+    app.aiIsPondering = True
+    app.aiSearch.isCancelled = False
+    app.aiResult = None
+    app.aiThread = threading.Thread(target = aiMode_runPonderSearch,
+                                    args = (app, position), daemon = True)
+    app.aiThread.start()
+
+# body of the pondering thread: no time limit until the player moves
+def aiMode_runPonderSearch(app, position):
+    bestMove, bestVal = app.aiSearch.getBestMove(position, app.aiMaxDepth,
+                                                 None, app.aiNodeLimit)
+    app.aiResult = bestMove
+
+# once the player has moved: if it was the predicted move, the pondering
+# search carries on as the AI's search, its time counted from when pondering
+# started (so it stops at once if the player took longer than app.aiTimeLimit);
+# otherwise it is dropped and a new search starts once it has stopped (see
+# aiMode_isCancelledSearchRunning), still helped by the table
+def aiMode_stopPondering(app):
+    app.aiIsPondering = False
+    position = getPositionFromPieces(app, app.whitePieces, app.blackPieces, False)
+    if position.getHash() == app.aiPonderHash:
+        app.aiPonderHits += 1
+        app.aiSearch.timeLimit = app.aiTimeLimit
+    else:
+        app.aiPonderMisses += 1
+        cancelAISearch(app)
+
+# instead of the thread: runs one slice of the search for black's move each
+# timerFired, starting it on the first, and plays the move once it is done
+def aiMode_continueSlicedSearch(app):
+    if not app.aiIsSlicing:
+        position = getPositionFromPieces(app, app.whitePieces, app.blackPieces, False)
+        bookMove = aiMode_getBookMove(app, position)
+        if bookMove != None:
+            aiMode_playSearchResult(app, bookMove)
+            return
+        app.aiSearch.startSlicedSearch(position, app.aiMaxDepth, app.aiTimeLimit,
+                                       app.aiNodeLimit, app.aiSliceNodes, app.aiSliceTime)
+        app.aiIsSlicing = True
+    result = app.aiSearch.continueSlicedSearch()
+    if result != None:
+        app.aiIsSlicing = False
+        bestMove, bestVal = result
+        aiMode_playSearchResult(app, bestMove)
+
+# plays the AI's encoded move on the board
+def aiMode_playMove(app, move):
+    fromRow, fromCol = squareToRowCol(moveFrom(move))
+    row, col = squareToRowCol(moveTo(move))
+    app.activePiece = app.gameBoard[fromRow][fromCol]
+    if isinstance(app.gameBoard[row][col], int):
+        makeMove(app, row, col)
+    else: # take move
+        takePiece(app, row, col)
 
 # general pseudocode structure: https://www.javatpoint.com/mini-max-algorithm-in-ai
-# backtracking minimax AI for computer player (black)
-# assumed that maximizing player is white
-def aiMode_minimax(app, whitePieces, blackPieces, gameBoard, depth, isMaxPlayerTurn, 
-                   alpha = -10000, beta = 10000):
-    isChecked = aiMode_isChecked(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn)
-    isMated = False
-    if isChecked:
-        isMated = aiMode_isMated(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn)
-
-    # base case 1: if depth = 0 or the current player is mated
-    if depth == 0 or isMated:
-        posVal = 0
-        playerColor = aiMode_getPlayerColor(isMaxPlayerTurn)
-
-        # add "value bonuses" if the move results in a check or mate
-        if isMated and playerColor == 'black':
-            posVal += 50
-        if isChecked and playerColor == 'black':
-            posVal += 15
-        if isMated and playerColor == "white":
-            posVal -= 50
-        if isChecked and playerColor == "white":
-            posVal -= 15
-
-        for pieceType in blackPieces:
-            for item in blackPieces[pieceType]:
-                posVal -= item.value
-        
-        for pieceType in whitePieces:
-            for item in whitePieces[pieceType]:
-                posVal += item.value
-       
-        return posVal
-    # base case 2: if the active player has no moves to play but isn't checked (stalemate)
-    elif aiMode_isStalemate(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn):
-        if isMaxPlayerTurn:
-            return 100000
-        else:
-            return -100000
-
-    # minimax recursive case
-    posMovesFromState = aiMode_getMovesFromState(app, whitePieces, blackPieces, gameBoard, isMaxPlayerTurn)
-    if isMaxPlayerTurn: 
-        maxEval = -100000  
-        for (piece, moveLoc) in posMovesFromState:
-            whiteCopy = copyPieces(app, whitePieces)
-            blackCopy = copyPieces(app, blackPieces)
-            pieceCopy = None
-
-            whitePieces[str(piece)].remove(piece)
-            pieceCopy = piece.copy()
-            whiteCopy[str(piece)] = {pieceCopy}
-            whitePieces[str(piece)].add(piece)
-        
-            gameBoardCopy = copyGameBoard(app, gameBoard)
-
-            isValidMove = aiMode_isValidMove(app, whiteCopy, blackCopy, 
-                                             gameBoardCopy, pieceCopy, moveLoc)
-            isValidTake = aiMode_isValidTake(app, whiteCopy, blackCopy, 
-                                             gameBoardCopy, pieceCopy, moveLoc)
-            
-            if isValidMove:
-                newState = aiMode_makeMove(app, whiteCopy, blackCopy, 
-                                           gameBoardCopy, pieceCopy, moveLoc)
-            elif isValidTake:
-                newState = aiMode_takePiece(app, whiteCopy, blackCopy, 
-                                           gameBoardCopy, pieceCopy, moveLoc)
-
-            newWhitePieces, newBlackPieces, newGameBoard = newState[0], newState[1], newState[2]
-            eval = aiMode_minimax(app, newWhitePieces, newBlackPieces, newGameBoard, 
-                                    depth - 1, not isMaxPlayerTurn, alpha, beta)  
-            maxEval = max(maxEval, eval)
-            alpha = max(alpha, eval)
-            if beta <= alpha:
-                break
-
-        return maxEval
-        
-    else:    
-        minEval = 100000   
-        for (piece, moveLoc) in posMovesFromState:
-            whiteCopy = copyPieces(app, whitePieces)
-            blackCopy = copyPieces(app, blackPieces)
-            pieceCopy = None
-
-            blackPieces[str(piece)].remove(piece)
-            pieceCopy = piece.copy()
-            blackCopy[str(pieceCopy)] = {pieceCopy}
-            blackPieces[str(piece)].add(piece)
-
-            gameBoardCopy = copyGameBoard(app, gameBoard)
-
-            isValidMove = aiMode_isValidMove(app, whiteCopy, blackCopy, 
-                                             gameBoardCopy, pieceCopy, moveLoc)
-            isValidTake = aiMode_isValidTake(app, whiteCopy, blackCopy, 
-                                             gameBoardCopy, pieceCopy, moveLoc)
-
-            if isValidMove:
-                newState = aiMode_makeMove(app, whiteCopy, blackCopy, 
-                                           gameBoardCopy, pieceCopy, moveLoc)
-            elif isValidTake:
-                newState = aiMode_takePiece(app, whiteCopy, blackCopy, 
-                                           gameBoardCopy, pieceCopy, moveLoc)
-            newWhitePieces, newBlackPieces, newGameBoard = newState[0], newState[1], newState[2]
-            eval = aiMode_minimax(app, newWhitePieces, newBlackPieces, newGameBoard, 
-                                      depth - 1, not isMaxPlayerTurn, alpha, beta)  
-            minEval = min(minEval, eval)    
-            beta = min(beta, eval)
-            if beta <= alpha:
-                break
-        return minEval
+# minimax value of position (white is the maximizing player), from the
+# negamax search in chessSearch.py which scores for the side to move
+def aiMode_minimax(app, position, depth, alpha = -INFINITY, beta = INFINITY):
+    if position.sideToMove == WHITE:
+        return app.aiSearch.search(position, depth, alpha, beta)
+    return -app.aiSearch.search(position, depth, -beta, -alpha)
 
 ########################
 # DRAW FUNCTIONS
@@ -1012,6 +615,10 @@ def twoPlayer_timerFired(app):
             app.blackTimer += 1 # in seconds
     app.timerCounter += 1
 
+# app stopped function for twoPlayer mode
+def twoPlayer_appStopped(app):
+    stopAI(app)
+
 def twoPlayer_mouseMoved(app, event):    
     x, y = event.x, event.y
     app.resumeButtonColor = app.normalButtonColor
@@ -1123,31 +730,12 @@ def isValidTake(app, takeRow, takeCol, piece):
 
 # return True if there are pieces blocking piece from moveRow, moveCol
 def checkBlockingPieces(app, moveRow, moveCol, piece):
-    currRow, currCol = piece.row, piece.col
-    dRow, dCol = (moveRow - currRow), (moveCol - currCol)
-    if type(piece) != Knight:
-        dist = math.sqrt(dRow ** 2 + dCol ** 2)
-        unitDRow, unitDCol = math.ceil(dRow / dist), math.ceil(dCol / dist)
-        
-        if dRow / dist < 0:
-            unitDRow = -math.ceil(abs(dRow/dist))
-        if dCol / dist < 0:
-            unitDCol = -math.ceil(abs(dCol/dist))
-        tempRow, tempCol =  currRow + unitDRow, currCol + unitDCol
-
-        while (tempRow != moveRow) or (tempCol != moveCol):
-            tempPiece = app.gameBoard[tempRow][tempCol]
-            if (isinstance(tempPiece, ChessPiece) and
-                tempPiece.color == piece.color):
-                return False
-            # if piece is diff color & not the desired moveRow, moveCol location
-            elif (isinstance(tempPiece, ChessPiece) and
-                  tempPiece.color != piece.color and
-                  (tempRow != moveRow or tempCol != moveCol)):
-                return False
-            tempRow += unitDRow
-            tempCol += unitDCol
-
+    # knight moves are never blocked, and have no squares between their ends
+    between = BETWEEN[rowColToSquare(piece.row, piece.col)][rowColToSquare(moveRow, moveCol)]
+    for square in iterSquares(between):
+        row, col = squareToRowCol(square)
+        if isinstance(app.gameBoard[row][col], ChessPiece):
+            return False
     return True
 
 # if move is valid, make move and adjust set of same-color pieces accordingly
@@ -1192,6 +780,8 @@ def makeMove(app, row, col):
             eval(f"app.{rook.color}Pieces['R'].add(rook)")
         app.activePiece = findPiece(app, app.activePiece, eval(f"app.{app.activePiece.color}Pieces"))
         eval(f"app.{app.activePiece.color}Pieces[str(app.activePiece)].remove(app.activePiece)")
+        # the clicked piece can be a copy of the one in app.colorPieces
+        app.activePiece.moved = True
 
         # removes pawn double-move/castle move if piece is a pawn/king respectively
         if oldMovedState != True and type(app.activePiece) == Pawn:
@@ -1219,13 +809,16 @@ def makeMove(app, row, col):
         eval(f"app.{app.activePiece.color}Pieces[str(app.activePiece)].add(app.activePiece)")
 
         oppColor = getOpposingColor(app, app.activePiece)
+        updatePosition(app, oppColor)
         if isChecked(app, oppColor):
             app.checked = oppColor
             if isMated(app, oppColor):
                 app.gameOver = True
+                cancelAISearch(app)
                 return
         elif isStalemate(app, oppColor):
             app.stalemate = True
+            cancelAISearch(app)
             return
         else:
             app.checked = None
@@ -1276,13 +869,16 @@ def takePiece(app, row, col):
         eval(f"app.{app.activePiece.color}Pieces[str(app.activePiece)].add(app.activePiece)")
 
         oppColor = getOpposingColor(app, app.activePiece)
+        updatePosition(app, oppColor)
         if isChecked(app, oppColor):
             app.checked = oppColor
             if isMated(app, oppColor):
                 app.gameOver = True
+                cancelAISearch(app)
                 return
         elif isStalemate(app, oppColor):
             app.stalemate = True
+            cancelAISearch(app)
             return
         else:
             app.checked = None
@@ -1293,28 +889,32 @@ def takePiece(app, row, col):
         app.playerToMoveIdx += 1
         app.timerCounter = 0
 
-# returns True if checked
+# returns True if checked, from app.position's cached checkers and attack maps
 def isChecked(app, color):
-    king = eval(f"app.{color}Pieces['K'].pop()")
-    eval(f"app.{color}Pieces['K'].add(king)")
-    oppColor = None
-    if color == "white":
-        oppColor = "black"
-    else:
-        oppColor = "white"
+    return app.position.isChecked(WHITE if color == "white" else BLACK)
+
+# returns True if piece moving to row, col (taking whatever is there) would
+# leave its own king in check; only that piece moves, as in the game's own
+# move checks, so app.position is only read
+def isCheckedAfterMove(app, piece, row, col):
+    position = app.position
+    color = WHITE if piece.color == "white" else BLACK
+    fromSquare, toSquare = rowColToSquare(piece.row, piece.col), rowColToSquare(row, col)
+    kingSquare = position.kingSquares[color]
+    if kingSquare == fromSquare:
+        kingSquare = toSquare
+    if kingSquare == None:
+        return False
+    occupancy = position.occupancy[WHITE] | position.occupancy[BLACK]
+    occupancy = (occupancy & ~(1 << fromSquare)) | (1 << toSquare)
+    # a piece taken on toSquare no longer attacks
+    return position.getAttackers(kingSquare, 1 - color, occupancy) & ~(1 << toSquare) != 0
 
-    for knight in eval(f"app.{oppColor}Pieces['N']"):
-        (dRow, dCol) = (king.row - knight.row, king.col - knight.col)
-        if (dRow, dCol) in knight.takeMoves:
-            return True
-    
-    for key in {'P','B','R','Q','K'}:
-        for piece in eval(f"app.{oppColor}Pieces[key]"):
-            (dRow, dCol) = (king.row - piece.row, king.col - piece.col)
-            if ((dRow, dCol) in piece.takeMoves and 
-                checkBlockingPieces(app, king.row, king.col, piece)):
-                return True
-    return False
+# rebuilds app.position, the bitboard copy of the pieces that the check
+# queries use, after the pieces change; color is the side to move
+def updatePosition(app, color):
+    app.position = getPositionFromPieces(app, app.whitePieces, app.blackPieces,
+                                         color == "white")
 
 # returns True if game is at a stalemate
 def isStalemate(app, color):
@@ -1355,68 +955,13 @@ def attemptUndoCheck(app, tempRow, tempCol, piece):
     tempBoardSq = app.gameBoard[tempRow][tempCol]
     if isinstance(tempBoardSq, ChessPiece) and tempBoardSq.color == piece.color:
         return False
-    oppColor = getOpposingColor(app, piece)
-    color = piece.color
-    pieceCopy = piece.copy()
-
-    whitePiecesCopy = copyPieces(app, app.whitePieces)
-    blackPiecesCopy = copyPieces(app, app.blackPieces)
     dRow, dCol = tempRow - piece.row, tempCol - piece.col
-    if isinstance(tempBoardSq, ChessPiece) and tempBoardSq.color != piece.color:
-        oppColorPiece = tempBoardSq
-        if piece.hasTake(dRow, dCol):
-            oppColorPiece = findPiece(app, oppColorPiece, eval(f"app.{oppColor}Pieces"))
-            eval(f"app.{oppColor}Pieces[str(oppColorPiece)].remove(oppColorPiece)")
-            app.gameBoard[tempRow][tempCol] = piece
-            app.gameBoard[piece.row][piece.col] = 0
-            piece = findPiece(app, piece, eval(f"app.{piece.color}Pieces"))
-            eval(f"app.{color}Pieces[str(piece)].remove(piece)")
-
-            pieceCopy.row, pieceCopy.col = tempRow, tempCol
-            eval(f"app.{color}Pieces[str(pieceCopy)].add(pieceCopy)")
-
-            result = None
-            if isChecked(app, color):
-                result = False
-            else:
-                result = True
-            
-            app.gameBoard[tempRow][tempCol] = oppColorPiece
-
-            app.gameBoard[piece.row][piece.col] = piece
-
-            pieceCopy = findPiece(app, pieceCopy, eval(f"app.{pieceCopy.color}Pieces"))
-            eval(f"app.{color}Pieces[str(pieceCopy)].remove(pieceCopy)")
-            eval(f"app.{color}Pieces[str(piece)].add(piece)")
-            eval(f"app.{oppColor}Pieces[str(oppColorPiece)].add(oppColorPiece)")
-            app.whitePieces = whitePiecesCopy
-            app.blackPieces = blackPiecesCopy
-            return result
-    else:
-        if piece.hasMove(dRow, dCol): 
-            app.gameBoard[tempRow][tempCol] = piece
-            app.gameBoard[piece.row][piece.col] = 0
-            # find piece
-            piece = findPiece(app, piece, eval(f"app.{color}Pieces"))
-            eval(f"app.{color}Pieces[str(piece)].remove(piece)")
-
-            pieceCopy.row, pieceCopy.col = tempRow, tempCol
-            eval(f"app.{color}Pieces[str(pieceCopy)].add(pieceCopy)")
-            result = None
-            if isChecked(app, color):
-                result = False
-            else:
-                result = True
-
-            app.gameBoard[tempRow][tempCol] = 0
-            app.gameBoard[piece.row][piece.col] = piece
-            pieceCopy = findPiece(app, pieceCopy, eval(f"app.{pieceCopy.color}Pieces"))
-            eval(f"app.{color}Pieces[str(pieceCopy)].remove(pieceCopy)")
-            eval(f"app.{color}Pieces[str(piece)].add(piece)")
-            app.whitePieces = whitePiecesCopy
-            app.blackPieces = blackPiecesCopy
-            return result
-    return False
+    if isinstance(tempBoardSq, ChessPiece):
+        if not piece.hasTake(dRow, dCol):
+            return False
+    elif not piece.hasMove(dRow, dCol):
+        return False
+    return not isCheckedAfterMove(app, piece, tempRow, tempCol)
 
 def findPiece(app, piece, pieceDict):
     for item in pieceDict[str(piece)]:
@@ -1765,131 +1310,20 @@ def twoPlayer_redrawAll(app, canvas):
 # GENERAL CONTROLS
 #################################################
 
-# general keyPressed functions for test cases
+# general keyPressed functions for test cases (positions are in chessScenarios.py)
 def keyPressed(app, event):
     key = event.key
     restartGame(app)
-    if key.isdigit() and int(key) not in {2, 5}:
-        app.whitePieces = {"P": set(), "B": set(), "N": set(), 
-                        "R": set(), "K": set(), "Q": set()}
-        app.blackPieces = {"P": set(), "B": set(), "N": set(), 
-                        "R": set(), "K": set(), "Q": set()}
-        app.gameBoard = [[0] * 8 for i in range(8)]
-    if key == "1": # knight-queen mate
-        wKnight1 = Knight(3, 3, "white")
-        wQueen = Queen(1, 2, 'white')
-        wKing = King(7, 4, 'white', True)
-        for whitePiece in {wKnight1, wQueen, wKing}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-
-        bKing = King(0, 4, "black", True)
-        app.blackPieces[str(bKing)].add(bKing)
-        app.gameBoard[bKing.row][bKing.col] = bKing
-
-    elif key == "2": # fool's mate (against white)
-        app.activePiece = app.gameBoard[6][5]
-        makeMove(app, 5, 5)
-        app.activePiece = app.gameBoard[1][4]
-        makeMove(app, 3, 4)
-        app.activePiece = app.gameBoard[6][6]
-        makeMove(app, 4, 6)
-
-    elif key == "3": # backrank mate (against black)
-        wQueen = Queen(7, 3, 'white')
-        wKing = King(7, 4, 'white', True)
-        for whitePiece in {wQueen, wKing}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-
-        bKing = King(0, 6, "black", True)
-        bPawn1 = Pawn(1, 5, "black")
-        bPawn2 = Pawn(1, 6, "black")
-        bPawn3 = Pawn(1, 7, "black")
-        for blackPiece in {bPawn1, bPawn2, bPawn3, bKing}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-    elif key == "4": # two-rook mate (against white)
-        wKing = King(7, 1, "white", True)
-        app.whitePieces['K'].add(wKing)
-        app.gameBoard[wKing.row][wKing.col] = wKing
-
-        bKing = King(0, 4, "black", True)
-        bRook1 = Rook(5, 3, "black", True)
-        bRook2 = Rook(6, 6, "black", True)
-        for blackPiece in {bKing, bRook1, bRook2}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-    elif key == "5": # simple check with bishop
-        app.activePiece = app.gameBoard[6][4]
-        makeMove(app, 4, 4)
-        app.activePiece = app.gameBoard[1][3]
-        makeMove(app, 3, 3)
-
-    elif key == "6": # backrank check (not mate)
-        wQueen = Queen(7, 3, 'white')
-        wKing = King(7, 4, 'white', True)
-        wBishop1 = Bishop(4, 2, 'white')
-        for whitePiece in {wQueen, wKing, wBishop1}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-
-        bKing = King(0, 6, "black", True)
-        bPawn1 = Pawn(1, 5, "black")
-        bPawn2 = Pawn(1, 6, "black")
-        bPawn3 = Pawn(2, 7, "black")
-        for blackPiece in {bPawn1, bPawn2, bPawn3, bKing}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-    elif key == "7": # simple black check white using queen (with mate in 2)
-        bKnight1 = Knight(4, 3, "black")
-        bQueen = Queen(1, 2, 'black')
-        bKing = King(0, 4, 'black', True)
-        for blackPiece in {bKnight1, bQueen, bKing}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-        wKing = King(7, 3, "white", True)
-        wRook1 = Rook(7, 0, "white", True)
-        for whitePiece in {wRook1, wKing}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-        app.playerToMoveIdx += 1
-
-    elif key == "8": # black king far-side castle demonstration
-        bRook1 = Rook(0, 0, "black")
-        bQueen = Queen(1, 2, 'black')
-        bKing = King(0, 4, 'black')
-        bKing.posMoves.remove((0, 2))
-        for blackPiece in {bRook1, bQueen, bKing}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-        wKing = King(6, 3, "white", True)
-        for whitePiece in {wKing}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-        app.playerToMoveIdx += 1
-
-    elif key == "9": # white king near-side castle demonstration
-        bKing = King(0, 4, 'black', True)
-        for blackPiece in {bKing}:
-            app.blackPieces[str(blackPiece)].add(blackPiece)
-            app.gameBoard[blackPiece.row][blackPiece.col] = blackPiece
-
-        wKing = King(7, 4, "white")
-        wKing.posMoves.remove((0, -2))
-        wQueen = Queen(7, 3, "white")
-        wRook = Rook(7, 7, "white")
-        for whitePiece in {wRook, wQueen, wKing}:
-            app.whitePieces[str(whitePiece)].add(whitePiece)
-            app.gameBoard[whitePiece.row][whitePiece.col] = whitePiece
-
-    elif key == "0": # resets game
-        restartGame(app)
+    # scenarios played out from the starting position
+    if key in SCENARIO_MOVES:
+        for ((fromRow, fromCol), (toRow, toCol)) in SCENARIO_MOVES[key]:
+            app.activePiece = app.gameBoard[fromRow][fromCol]
+            makeMove(app, toRow, toCol)
+    elif key in SCENARIO_PIECES:
+        position = getScenarioPosition(key)
+        setPiecesFromPosition(app, position)
+        if position.sideToMove == BLACK:
+            app.playerToMoveIdx += 1
 
 # returns number of pieces in dictionary
 def getNumberOfPieces(app, d):
@@ -1970,14 +1404,57 @@ def copyGameBoard(app, board):
         gameBoardCopy.append(rowCopy)
     return gameBoardCopy
 
-# copies inputted dict and pieces inside
-def copyPieces(app, pieceDict):
-    pieceDictCopy = dict()
-    for key in pieceDict:
-        pieceDictCopy[key] = pieceDictCopy.get(key, set())
-        for piece in pieceDict[key]:
-            pieceDictCopy[key].add(piece.copy())
-    return pieceDictCopy
+# builds a bitboard Position from piece dictionaries
+def getPositionFromPieces(app, whitePieces, blackPieces, isMaxPlayerTurn):
+    position = Position()
+    for (color, pieceDict) in ((WHITE, whitePieces), (BLACK, blackPieces)):
+        for pieceType in pieceDict:
+            for piece in pieceDict[pieceType]:
+                # a pawn counts as unmoved while it still has its double
+                # move, which is what the game itself goes by
+                moved = piece.moved
+                if type(piece) == Pawn:
+                    moved = (-2, 0) not in piece.posMoves and (2, 0) not in piece.posMoves
+                position.addPiece(color, PIECE_LETTERS[pieceType],
+                                  rowColToSquare(piece.row, piece.col), moved)
+                # an unmoved king keeps whichever castle moves it still has,
+                # as long as the rook has not been taken from its corner
+                if type(piece) == King and piece.moved == False:
+                    rookCols = {rook.col for rook in pieceDict["R"] if rook.row == piece.row}
+                    for (dRow, dCol) in King.castleMoves:
+                        rookCol = 7 if dCol > 0 else 0
+                        if (dRow, dCol) in piece.posMoves and rookCol in rookCols:
+                            position.castling |= getCastleRight(color, dCol)
+    if isMaxPlayerTurn:
+        position.sideToMove = WHITE
+    else:
+        position.sideToMove = BLACK
+    return position
+
+# replaces app.whitePieces, app.blackPieces and app.gameBoard with position's pieces
+def setPiecesFromPosition(app, position):
+    pieceClasses = {"P": Pawn, "N": Knight, "B": Bishop,
+                    "R": Rook, "Q": Queen, "K": King}
+    app.whitePieces = {"P": set(), "B": set(), "N": set(), 
+                       "R": set(), "K": set(), "Q": set()}
+    app.blackPieces = {"P": set(), "B": set(), "N": set(), 
+                       "R": set(), "K": set(), "Q": set()}
+    app.gameBoard = [[0] * 8 for i in range(8)]
+    for square in range(64):
+        if position.pieceAt(square) == None:
+            continue
+        color, pieceType = position.pieceAt(square)
+        row, col = squareToRowCol(square)
+        moved = (position.unmoved >> square) & 1 == 0
+        pieceName = PIECE_NAMES[pieceType]
+        piece = pieceClasses[pieceName](row, col, COLOR_NAMES[color], moved)
+        if type(piece) == King and moved == False:
+            for (dRow, dCol) in King.castleMoves:
+                if not position.castling & getCastleRight(color, dCol):
+                    piece.posMoves.discard((dRow, dCol))
+        eval(f"app.{COLOR_NAMES[color]}Pieces[pieceName].add(piece)")
+        app.gameBoard[row][col] = piece
+    updatePosition(app, COLOR_NAMES[position.sideToMove])
 
 #################################################
 # APP STARTED METHODS
@@ -2017,52 +1494,12 @@ def initGameBoardVars(app):
 
 # initializes all chess board variables 
 def initBoardVars(app):
-    app.whitePieces = {"P": set(), "B": set(), "N": set(), 
-                       "R": set(), "K": set(), "Q": set()}
-    app.blackPieces = {"P": set(), "B": set(), "N": set(), 
-                       "R": set(), "K": set(), "Q": set()}
     app.whiteTakenPieces = {"P": set(), "B": set(), "N": set(), 
                             "R": set(), "K": set(), "Q": set()}
     app.blackTakenPieces = {"P": set(), "B": set(), "N": set(), 
                             "R": set(), "K": set(), "Q": set()}
 
-    for col in range(app.cols):
-        bPawn, wPawn = Pawn(1, col, "black"), Pawn(app.rows - 2, col, "white")
-        app.gameBoard[1][col] = bPawn
-        app.gameBoard[app.rows - 2][col] = wPawn
-        app.blackPieces["P"].add(bPawn)
-        app.whitePieces["P"].add(wPawn)
-    
-    for row in {0, app.rows - 1}:
-        if row == 0: 
-            color = "black"
-        else:
-            color = "white"
-
-        for col in {0, app.cols - 1}:
-            newRook = Rook(row, col, color)
-            app.gameBoard[row][col] = newRook
-            eval(f"app.{color}Pieces['R'].add(newRook)")
-        for col in {1, app.cols - 2}:
-            newKnight = Knight(row, col, color)
-            app.gameBoard[row][col] = newKnight
-            eval(f"app.{color}Pieces['N'].add(newKnight)")
-        for col in {2, app.cols - 3}:
-            newBishop = Bishop(row, col, color)
-            app.gameBoard[row][col] = newBishop
-            eval(f"app.{color}Pieces['B'].add(newBishop)")
-
-        if color == "white":
-            wQueen, wKing = Queen(row, 3, color), King(row, 4, color)
-            app.gameBoard[row][3], app.gameBoard[row][4] = wQueen, wKing
-            app.whitePieces["Q"] = {wQueen}
-            app.whitePieces["K"] = {wKing}
-        else:
-            bQueen, bKing = Queen(row, 3, color), King(row, 4, color)
-            app.gameBoard[row][3] = bQueen
-            app.gameBoard[row][4] = bKing
-            app.blackPieces["Q"] = {bQueen}
-            app.blackPieces["K"] = {bKing}
+    setPiecesFromPosition(app, getStartPosition())
 
 # initiate variables related to pause button and menu
 def initPauseButtonVars(app):
@@ -2104,6 +1541,79 @@ def initHomeScreenVars(app):
     app.twoPlayerButtonX = app.width * (5/16)
     app.aiModeButtonX = app.width * (11/16)
 
+# initiates AI search settings; the transposition table is kept between moves
+def initAIVars(app):
+    # iterative deepening stops at whichever limit is reached first
+    app.aiMaxDepth = 20
+    app.aiTimeLimit = 1.0
+    app.aiNodeLimit = None
+    app.ttSizeMB = 16
+    # score the leaves in NumPy batches, with mobility (see chessBatchEvaluation.py)
+    app.aiUseBatchEvaluation = False
+    # endgame tables (built by chessTablebase.py) give perfect play once they apply
+    app.tablebase = Tablebase()
+    app.aiSearch = Search(app.ttSizeMB, useBatchEvaluation = app.aiUseBatchEvaluation,
+                          tablebase = app.tablebase)
+    # with more than one worker, root moves are searched in parallel processes
+    # to the fixed depth app.aiParallelDepth instead
+    app.aiWorkers = 1
+    app.aiParallelDepth = 4
+    # the search and its workers share a transposition table of this size in
+    # shared memory
+    app.sharedTTSizeMB = 16
+    # (this starts the worker processes, here on the UI thread)
+    app.parallelSearch = ParallelSearch(app.aiWorkers, app.sharedTTSizeMB,
+                                        tablebase = app.tablebase)
+    # background search thread for the AI's move, and the move it found
+    app.aiThread = None
+    app.aiResult = None
+    # a cancelled search thread that has not stopped yet
+    app.aiCancelledThread = None
+    # alternatively the search runs on the UI thread, a slice of at most
+    # app.aiSliceNodes nodes or app.aiSliceTime seconds per timerFired
+    app.aiUseSlicedSearch = False
+    app.aiSliceNodes = None
+    app.aiSliceTime = 0.02
+    app.aiIsSlicing = False
+    # pondering: searching on the player's time (see aiMode_startPondering);
+    # the thread above runs it, with the position it expects to search next
+    app.aiPonder = True
+    app.aiIsPondering = False
+    app.aiPonderHash = None
+    app.aiPonderHits = app.aiPonderMisses = 0
+    # opening book (built by chessBook.py), played from while it has the position
+    app.openingBook = None
+    if os.path.exists(BOOK_PATH):
+        app.openingBook = OpeningBook(BOOK_PATH)
+
+# stops a running AI search (see aiMode_startSearch) and discards its result;
+# this does not wait for the thread, which stops at its next limit check (or
+# once its parallel root moves finish), so the UI never blocks on it
+def cancelAISearch(app):
+    if app.aiThread != None:
+        app.aiSearch.cancel()
+        app.parallelSearch.cancel()
+        app.aiCancelledThread = app.aiThread
+        app.aiThread = None
+        app.aiResult = None
+    app.aiIsPondering = False
+    if app.aiIsSlicing:
+        app.aiSearch.cancelSlicedSearch()
+        app.aiIsSlicing = False
+
+# frees the AI worker processes, shared memory, opening book and tablebases
+# when the app closes
+def stopAI(app):
+    cancelAISearch(app)
+    if app.aiCancelledThread != None:
+        app.aiCancelledThread.join()
+        app.aiCancelledThread = None
+    app.parallelSearch.close()
+    if app.openingBook != None:
+        app.openingBook.close()
+        app.openingBook = None
+    app.tablebase.close()
+
 def initButtonVars(app):
     app.isHoveringOnButton = False
     app.normalButtonColor = 'blanchedalmond'
@@ -2113,6 +1623,7 @@ def initButtonVars(app):
     app.okButtonColor = app.pauseButtonColor = app.normalButtonColor
 
 def restartGame(app):
+    cancelAISearch(app)
     initGameBoardVars(app)
     initButtonVars(app)
     initTimerVars(app)
@@ -2133,6 +1644,7 @@ def appStarted(app):
     initGraphicsVars(app)
     initButtonVars(app)
     initTimerVars(app)
+    initAIVars(app)
     app.menuBackground = "tan"
 
     # game-related variables
@@ -2160,4 +1672,5 @@ def appStarted(app):
 def redrawAll(app, canvas):
     pass
 
-runApp(width = 600, height = 600)
\ No newline at end of file
+if __name__ == "__main__":
+    runApp(width = 600, height = 600)
\ No newline at end of file
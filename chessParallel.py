@@ -0,0 +1,315 @@
+#################################################
+# chessParallel.py
+#
+# Root-parallel search: the root moves of every iteration are shared out
+# over a process pool whose workers keep one search each and share one
+# transposition table with the main search
+#################################################
+
+import atexit
+import pickle
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from multiprocessing import shared_memory
+from chessPosition import moveTo
+from chessSearch import Search, TranspositionTable, ENTRY_BYTES
+from chessTablebase import Tablebase
+
+# iterations shallower than this are searched in the main process alone
+SPLIT_MIN_DEPTH = 3
+
+#################################################
+# SHARED TRANSPOSITION TABLE
+#################################################
+
+# a transposition table in a shared memory block that every worker process
+# attaches to by name and reads and writes while the others do; each slot
+# is two 64-bit words, (hash ^ data, data), so a slot half overwritten by
+# another process fails the hash check on probe instead of needing a lock
+class SharedTranspositionTable(TranspositionTable):
+    # name None creates (and owns) a new block, otherwise attaches to it
+    def __init__(self, sizeMB = 16, name = None):
+        self.numEntries = max(1, (sizeMB * 1024 * 1024) // ENTRY_BYTES)
+        self.isOwner = name == None
+        if self.isOwner:
+            # new blocks are zero-filled, so every slot starts empty
+            self.sharedMemory = shared_memory.SharedMemory(
+                create = True, size = self.numEntries * ENTRY_BYTES)
+            atexit.register(self.close)
+        else:
+            self.sharedMemory = shared_memory.SharedMemory(name = name)
+        self.name = self.sharedMemory.name
+        self.words = self.sharedMemory.buf.cast("Q")
+        self.age = 0
+        self.resetStats()
+
+    def readSlot(self, idx):
+        check, data = self.words[2 * idx], self.words[2 * idx + 1]
+        return check ^ data, data
+
+    def writeSlot(self, idx, hash, data):
+        self.words[2 * idx] = hash ^ data
+        self.words[2 * idx + 1] = data
+
+    def clear(self):
+        size = self.numEntries * ENTRY_BYTES
+        self.sharedMemory.buf[:size] = bytes(size)
+        self.age = 0
+
+    # detaches from the block; the owner also frees it
+    def close(self):
+        if self.words == None:
+            return
+        self.words.release()
+        self.words = None
+        self.sharedMemory.close()
+        if self.isOwner:
+            self.sharedMemory.unlink()
+            atexit.unregister(self.close)
+
+#################################################
+# WORKERS
+#################################################
+
+# the search of this worker process, kept from task to task, and the root
+# position it searches moves of, as (rootId, position)
+workerSearch = None
+workerRoot = (None, None)
+
+# starts a worker process: sharedTT names the shared table as (name, sizeMB),
+# or is None for a table of the worker's own, and signatures are those of
+# the tablebase's tables, or None for none
+def initWorker(searchOptions, sharedTT, signatures):
+    global workerSearch
+    table = None
+    if sharedTT != None:
+        name, sizeMB = sharedTT
+        table = SharedTranspositionTable(sizeMB, name)
+    tablebase = None
+    if signatures != None:
+        tablebase = Tablebase(signatures)
+    workerSearch = Search(transpositionTable = table, tablebase = tablebase,
+                          **searchOptions)
+
+# a worker's part of SplitRootSearch: searches move of the root (rootState,
+# the pickled root position, called rootId) with a zero window at alpha and
+# returns (score for the side to move at the root, nodes), a score above
+# alpha meaning the move has to be searched again; age is the main search's
+# table age
+def searchRootMove(rootId, rootState, move, depth, alpha, reduction, age):
+    global workerRoot
+    if workerRoot[0] != rootId:
+        workerRoot = (rootId, pickle.loads(rootState))
+    position = workerRoot[1]
+    search = workerSearch
+    search.tt.age = age
+    search.nodes = 0
+    search.stopped = False
+    position.makeMove(move)
+    score = search.searchLateMove(position, depth, alpha, alpha + 1, 0, reduction)
+    position.unmakeMove(move)
+    return score, search.nodes
+
+#################################################
+# ROOT-PARALLEL SEARCH
+#################################################
+
+# the serial search, except that the root of every iteration from
+# SPLIT_MIN_DEPTH on hands the moves after the first to the workers (see
+# searchSplitRoot)
+class SplitRootSearch(Search):
+    def __init__(self, executor, searchOptions, transpositionTable = None,
+                 tablebase = None):
+        Search.__init__(self, transpositionTable = transpositionTable,
+                        tablebase = tablebase, **searchOptions)
+        self.executor = executor
+        self.futures = []
+        # roots handed to the workers so far, to name the next one
+        self.numRoots = 0
+
+    def cancel(self):
+        Search.cancel(self)
+        for future in self.futures:
+            future.cancel()
+
+    def resetStats(self):
+        Search.resetStats(self)
+        # nodes searched by the workers (not counted in self.nodes)
+        self.workerNodes = 0
+
+    def runSearch(self, position, depth, alpha, beta):
+        if self.executor != None and depth >= SPLIT_MIN_DEPTH:
+            return self.searchSplitRoot(position, depth, alpha, beta)
+        return (yield from Search.runSearch(self, position, depth, alpha, beta))
+
+    # the root as search() searches it, except that once the first move is
+    # searched the others are tried in the workers all at once, each at the
+    # alpha the first move left; then the moves are taken in order here,
+    # skipping the ones that failed low in a worker (they would fail low at
+    # a higher alpha too) and searching the others again with the current
+    # alpha, so ties still go to the earlier move
+    def searchSplitRoot(self, position, depth, alpha, beta):
+        score, isChecked, hash, hashMove = self.probeNode(position, depth, alpha, beta, 0)
+        if score != None:
+            return score
+        # the root is a PV node, so nothing is pruned, and iterateDeepening
+        # has made sure it has moves
+        moves = position.getLegalMoves()
+        self.prepareMoves(position, moves, hashMove, depth, 0, False)
+
+        originalAlpha = alpha
+        bestMove = moves[0]
+        position.makeMove(bestMove)
+        bestScore = -self.search(position, depth - 1, -beta, -alpha, 1)
+        position.unmakeMove(bestMove)
+        self.isFollowingPV = False
+        if self.stopped:
+            return 0
+        if bestScore > alpha:
+            alpha = bestScore
+            self.pvTable[0] = [bestMove] + self.pvTable[1]
+        if alpha >= beta:
+            self.betaCutoffs += 1
+            self.firstMoveCutoffs += 1
+            if position.board[moveTo(bestMove)] == 0 and self.useMoveOrdering:
+                self.updateQuietCutoff(bestMove, depth, 0)
+            moves = moves[:1]
+
+        reductions = self.getRootReductions(position, moves, depth, isChecked)
+        workerAlpha = alpha
+        workerScores = self.searchInWorkers(position, moves, depth, alpha, reductions)
+        if workerScores == None:
+            self.stopped = True
+            return 0
+        for moveIdx in range(1, len(moves)):
+            move = moves[moveIdx]
+            score = workerScores[moveIdx]
+            if score > workerAlpha:
+                position.makeMove(move)
+                score = self.searchLateMove(position, depth, alpha, beta, 0,
+                                            reductions[moveIdx])
+                position.unmakeMove(move)
+                if self.stopped:
+                    return 0
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    self.pvTable[0] = [move] + self.pvTable[1]
+                    if alpha >= beta:
+                        self.betaCutoffs += 1
+                        if position.board[moveTo(move)] == 0 and self.useMoveOrdering:
+                            self.updateQuietCutoff(move, depth, 0)
+                        break
+        self.batchScores[1] = None
+
+        if self.useTranspositionTable:
+            self.storeNode(hash, depth, 0, bestScore, originalAlpha, beta, bestMove)
+        return bestScore
+
+    # the late move reduction of each root move (0 for the first); they do not
+    # change during the root's search, since only a cutoff at the root, which
+    # ends it, changes the killers there
+    def getRootReductions(self, position, moves, depth, isChecked):
+        reductions = [0]
+        for moveIdx in range(1, len(moves)):
+            move = moves[moveIdx]
+            isCapture = position.board[moveTo(move)] != 0
+            position.makeMove(move)
+            reductions.append(self.getLateMoveReduction(position, depth, moveIdx, move,
+                                                        isCapture, isChecked, 0))
+            position.unmakeMove(move)
+        return reductions
+
+    # searches moves after the first in the workers with a zero window at
+    # alpha; returns their scores by index (None for the first), or None if
+    # the search was cancelled
+    def searchInWorkers(self, position, moves, depth, alpha, reductions):
+        # the position is pickled once for all the tasks, and each worker
+        # unpickles it once
+        self.numRoots += 1
+        rootState = pickle.dumps(position)
+        self.futures = [self.executor.submit(searchRootMove, self.numRoots, rootState,
+                                             moves[moveIdx], depth, alpha,
+                                             reductions[moveIdx], self.tt.age)
+                        for moveIdx in range(1, len(moves))]
+        try:
+            results = [future.result() for future in self.futures]
+        except CancelledError:
+            return None
+        finally:
+            self.futures = []
+        if self.isCancelled:
+            return None
+        self.workerNodes += sum(nodes for (score, nodes) in results)
+        return [None] + [score for (score, nodes) in results]
+
+class ParallelSearch(object):
+    # searchOptions are Search keyword arguments (useNullMove = False, ...);
+    # with sharedTTSizeMB the main search and the workers share one
+    # transposition table in shared memory, otherwise each has its own;
+    # each worker opens the tables of tablebase itself
+    def __init__(self, workers = 4, sharedTTSizeMB = 16, tablebase = None, **searchOptions):
+        self.workers = workers
+        self.sharedTTSizeMB = sharedTTSizeMB
+        self.tablebase = tablebase
+        self.searchOptions = searchOptions
+        self.executor = None
+        self.sharedTT = None
+        if workers > 1:
+            # create the shared table before the workers so they inherit this
+            # process's resource tracker; one of their own would unlink the
+            # block when the worker exits
+            sharedTT = None
+            if sharedTTSizeMB != None:
+                self.sharedTT = SharedTranspositionTable(sharedTTSizeMB)
+                sharedTT = (self.sharedTT.name, sharedTTSizeMB)
+            signatures = None
+            if tablebase != None:
+                signatures = tuple(tablebase.tables)
+            # the workers are started now, on the caller's thread, rather
+            # than by the first search (which may run in another thread)
+            self.executor = ProcessPoolExecutor(
+                max_workers = workers, initializer = initWorker,
+                initargs = (searchOptions, sharedTT, signatures))
+            for future in [self.executor.submit(int) for idx in range(workers)]:
+                future.result()
+        # the search, made by the first getBestMove and then kept from move to
+        # move with its table, like the serial one
+        self.search = None
+        self.isCancelled = False
+        self.nodes = 0
+
+    # asks a search running in another thread to stop: root moves not yet
+    # started are dropped (ones already running in a worker still finish) and
+    # getBestMove returns (None, None); the caller clears isCancelled
+    def cancel(self):
+        self.isCancelled = True
+        if self.search != None:
+            self.search.cancel()
+
+    def close(self):
+        if self.executor != None:
+            self.executor.shutdown(wait = True, cancel_futures = True)
+            self.executor = None
+        if self.sharedTT != None:
+            self.sharedTT.close()
+            self.sharedTT = None
+
+    # returns (bestMove, score) for the side to move, or (None, score) if
+    # there are no legal moves, as Search(**searchOptions).getBestMove does,
+    # with the root of each iteration searched in parallel when there is more
+    # than one worker; root moves that fail low in a worker are not searched
+    # here, and the entries the workers store change what the main search
+    # finds in the table, so the score (rarely the move) can differ from the
+    # serial search's, and from one run to the next
+    def getBestMove(self, position, depth):
+        if self.search == None:
+            self.search = SplitRootSearch(self.executor, self.searchOptions,
+                                          self.sharedTT, self.tablebase)
+        self.search.isCancelled = self.isCancelled
+        result = self.search.getBestMove(position, depth)
+        self.nodes = self.search.nodes + self.search.workerNodes
+        if self.isCancelled:
+            return None, None
+        return result
@@ -0,0 +1,111 @@
+#################################################
+# chessPerft.py
+#
+# Perft: counts the leaf nodes of the move tree to a fixed depth with the
+# AI's move generator (Position.getLegalMoves), to check it against the
+# reference counts kept in chessPerft.json
+# usage: python chessPerft.py                          (checks every count)
+#        python chessPerft.py depth [name] [workers]   (divide of one position)
+#################################################
+
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from chessPosition import getStartPosition
+from chessScenarios import getScenarioPosition
+from chessBook import moveToName
+
+# reference counts by position name, for depths 1, 2, ...
+PERFT_PATH = "chessPerft.json"
+
+# the position called name: "start", or a keyPressed scenario key
+def getPerftPosition(name):
+    if name == "start":
+        return getStartPosition()
+    return getScenarioPosition(name)
+
+#################################################
+# COUNTING
+#################################################
+
+# returns the number of move sequences depth plies long from position; the
+# moves of the last ply are counted without being played
+def perft(position, depth):
+    if depth == 0:
+        return 1
+    moves = position.getLegalMoves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.makeMove(move)
+        nodes += perft(position, depth - 1)
+        position.unmakeMove(move)
+    return nodes
+
+# perft of position after move, one root move of divide (run in a worker
+# process when divide has more than one)
+def perftRootMove(position, move, depth):
+    position.makeMove(move)
+    nodes = perft(position, depth - 1)
+    position.unmakeMove(move)
+    return nodes
+
+# returns [(move, nodes)], the perft of position (depth at least 1) split by
+# root move; with more than one worker the root moves are shared out over a
+# process pool
+def divide(position, depth, workers = 1):
+    moves = position.getLegalMoves()
+    if workers <= 1:
+        return [(move, perftRootMove(position, move, depth)) for move in moves]
+    with ProcessPoolExecutor(workers) as executor:
+        counts = executor.map(perftRootMove, [position] * len(moves), moves,
+                              [depth] * len(moves))
+        return list(zip(moves, counts))
+
+#################################################
+# REPORTS
+#################################################
+
+# prints the divide of the position called name, then its total and speed
+def printDivide(name, depth, workers = 1):
+    startTime = time.perf_counter()
+    counts = divide(getPerftPosition(name), depth, workers)
+    seconds = time.perf_counter() - startTime
+    for (move, nodes) in sorted(counts, key = lambda count: moveToName(count[0])):
+        print(f"{moveToName(move)}: {nodes}")
+    total = sum(nodes for (move, nodes) in counts)
+    print(f"\n{len(counts)} moves, {total} nodes in {seconds:.3f} s, "
+          f"{total / seconds:.0f} nodes/s ({workers} worker{'s' if workers > 1 else ''})")
+
+def loadPerftCounts(path = PERFT_PATH):
+    with open(path) as countsFile:
+        return json.load(countsFile)["counts"]
+
+# recounts every reference count in path, printing each with its speed;
+# returns how many differ
+def checkPerft(path = PERFT_PATH, workers = 1):
+    failures = 0
+    print(f"{'name':>6} {'depth':>6} {'nodes':>10} {'expected':>10} {'nodes/s':>10}")
+    for (name, expectedCounts) in loadPerftCounts(path).items():
+        for (depth, expected) in enumerate(expectedCounts, 1):
+            startTime = time.perf_counter()
+            nodes = sum(count for (move, count) in
+                        divide(getPerftPosition(name), depth, workers))
+            seconds = time.perf_counter() - startTime
+            result = "" if nodes == expected else "  FAILED"
+            failures += nodes != expected
+            print(f"{name:>6} {depth:>6} {nodes:>10} {expected:>10} "
+                  f"{nodes / seconds:>10.0f}{result}")
+    print(f"{failures} failed")
+    return failures
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        depth = int(sys.argv[1])
+        name = sys.argv[2] if len(sys.argv) > 2 else "start"
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        printDivide(name, depth, workers)
+    else:
+        sys.exit(1 if checkPerft() > 0 else 0)
@@ -0,0 +1,594 @@
+#################################################
+# chessPosition.py
+#
+# Bitboard position representation used by the AI
+#################################################
+
+import random
+from chessAttacks import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, PAWN_PUSHES,
+                          BETWEEN, getRookAttacks, getBishopAttacks, getQueenAttacks)
+from chessEvaluation import MG_SCORES, EG_SCORES, PIECE_PHASES, MAX_PHASE
+
+#################################################
+# CONSTANTS
+#################################################
+
+# squares are numbered row * 8 + col, matching app.gameBoard[row][col]
+# (row 0 is black's back rank, row 7 is white's back rank)
+WHITE, BLACK = 0, 1
+COLOR_NAMES = ("white", "black")
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+PIECE_LETTERS = {"P": PAWN, "N": KNIGHT, "B": BISHOP,
+                 "R": ROOK, "Q": QUEEN, "K": KING}
+PIECE_NAMES = {PAWN: "P", KNIGHT: "N", BISHOP: "B",
+               ROOK: "R", QUEEN: "Q", KING: "K"}
+
+# same values as the ChessPiece subclasses' value fields
+PIECE_VALUES = {PAWN: 1, KNIGHT: 3, BISHOP: 3, ROOK: 5, QUEEN: 10, KING: 50}
+
+# castling rights, "king side" is towards col 7
+CASTLE_WHITE_KING, CASTLE_WHITE_QUEEN = 1, 2
+CASTLE_BLACK_KING, CASTLE_BLACK_QUEEN = 4, 8
+
+ALL_SQUARES = (1 << 64) - 1
+NOT_COL_0 = ALL_SQUARES ^ sum(1 << (row * 8) for row in range(8))
+NOT_COL_7 = ALL_SQUARES ^ sum(1 << (row * 8 + 7) for row in range(8))
+
+#################################################
+# HELPER FUNCTIONS
+#################################################
+
+# piece code stored on the board: type in the low 3 bits, color in bit 3
+def makePiece(color, pieceType):
+    return pieceType | (color << 3)
+
+def pieceColor(piece):
+    return piece >> 3
+
+def pieceType(piece):
+    return piece & 7
+
+def rowColToSquare(row, col):
+    return row * 8 + col
+
+def squareToRowCol(square):
+    return (square >> 3, square & 7)
+
+# moves are ints: from square in the low 6 bits, to square in the next 6
+def encodeMove(fromSquare, toSquare):
+    return fromSquare | (toSquare << 6)
+
+def moveFrom(move):
+    return move & 63
+
+def moveTo(move):
+    return (move >> 6) & 63
+
+# yields the square of every set bit in bitboard
+def iterSquares(bitboard):
+    while bitboard:
+        lowBit = bitboard & -bitboard
+        yield lowBit.bit_length() - 1
+        bitboard ^= lowBit
+
+def countBits(bitboard):
+    return bin(bitboard).count("1")
+
+# returns the castling right bit for color castling towards direction
+def getCastleRight(color, direction):
+    if color == WHITE:
+        return CASTLE_WHITE_KING if direction > 0 else CASTLE_WHITE_QUEEN
+    return CASTLE_BLACK_KING if direction > 0 else CASTLE_BLACK_QUEEN
+
+#################################################
+# POSITION CLASS
+#################################################
+
+class Position(object):
+    def __init__(self):
+        # one bitboard per piece code (index makePiece(color, type))
+        self.bitboards = [0] * 16
+        self.occupancy = [0, 0]
+        self.board = [0] * 64
+        # squares holding pieces that have never moved (pawn double steps)
+        self.unmoved = 0
+        self.castling = 0
+        self.sideToMove = WHITE
+        self.kingSquares = [None, None]
+        self.undoStack = []
+        # attack state, restored by unmakeMove instead of being recomputed;
+        # None means not computed yet (set sideToMove before querying)
+        self.checkers = None
+        self.attackMaps = [None, None]
+        self.attackStack = []
+        # Zobrist key, None until first needed
+        self.hash = None
+        # middlegame and endgame material plus piece-square scores (white
+        # positive) and game phase, kept up to date by putPiece/removePiece
+        self.mgScore = 0
+        self.egScore = 0
+        self.phase = 0
+
+    def copy(self):
+        other = Position.__new__(Position)
+        other.bitboards = self.bitboards[:]
+        other.occupancy = self.occupancy[:]
+        other.board = self.board[:]
+        other.unmoved = self.unmoved
+        other.castling = self.castling
+        other.sideToMove = self.sideToMove
+        other.kingSquares = self.kingSquares[:]
+        other.undoStack = self.undoStack[:]
+        other.checkers = self.checkers
+        other.attackMaps = self.attackMaps[:]
+        other.attackStack = self.attackStack[:]
+        other.hash = self.hash
+        other.mgScore = self.mgScore
+        other.egScore = self.egScore
+        other.phase = self.phase
+        return other
+
+    def addPiece(self, color, pieceType, square, moved = True):
+        piece = makePiece(color, pieceType)
+        bit = 1 << square
+        self.board[square] = piece
+        self.bitboards[piece] |= bit
+        self.occupancy[color] |= bit
+        self.mgScore += MG_SCORES[piece][square]
+        self.egScore += EG_SCORES[piece][square]
+        self.phase += PIECE_PHASES[piece]
+        if not moved:
+            self.unmoved |= bit
+        if pieceType == KING:
+            self.kingSquares[color] = square
+        self.checkers = None
+        self.attackMaps = [None, None]
+        self.hash = None
+
+    # returns (color, pieceType) at square, or None if it is empty
+    def pieceAt(self, square):
+        piece = self.board[square]
+        if piece == 0:
+            return None
+        return (pieceColor(piece), pieceType(piece))
+
+    def getPieces(self, color, pieceType):
+        return self.bitboards[makePiece(color, pieceType)]
+
+    def allOccupancy(self):
+        return self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    # material total using the ChessPiece value fields (white positive)
+    def getMaterial(self):
+        total = 0
+        for pieceType in PIECE_VALUES:
+            value = PIECE_VALUES[pieceType]
+            total += value * countBits(self.bitboards[makePiece(WHITE, pieceType)])
+            total -= value * countBits(self.bitboards[makePiece(BLACK, pieceType)])
+        return total
+
+    # tapered evaluation (white positive): the middlegame and endgame scores
+    # blended by phase, which falls as the knights, bishops, rooks and queens
+    # come off (set-up positions with extra pieces can go past MAX_PHASE)
+    def getEvaluation(self):
+        phase = min(self.phase, MAX_PHASE)
+        return (self.mgScore * phase + self.egScore * (MAX_PHASE - phase)) // MAX_PHASE
+
+    def getNumberOfPieces(self, color):
+        return countBits(self.occupancy[color])
+
+    ########################
+    # HASHING
+    ########################
+
+    # returns the 64-bit Zobrist key of the position (pieces, unmoved pawns,
+    # castling rights and side to move)
+    def getHash(self):
+        if self.hash is None:
+            self.hash = self.computeHash()
+        return self.hash
+
+    def computeHash(self):
+        hash = ZOBRIST_CASTLING[self.castling]
+        if self.sideToMove == BLACK:
+            hash ^= ZOBRIST_BLACK_TO_MOVE
+        for square in range(64):
+            piece = self.board[square]
+            if piece != 0:
+                hash ^= ZOBRIST_PIECES[piece][square]
+                if piece & 7 == PAWN and (self.unmoved >> square) & 1:
+                    hash ^= ZOBRIST_UNMOVED_PAWNS[square]
+        return hash
+
+    ########################
+    # ATTACK QUERIES
+    ########################
+
+    # returns True if square is attacked by any piece of byColor; without an
+    # occupancy this is a lookup in byColor's attack map
+    def isSquareAttacked(self, square, byColor, occupancy = None):
+        if occupancy is None:
+            return (self.getAttackMap(byColor) >> square) & 1 == 1
+        return self.getAttackers(square, byColor, occupancy) != 0
+
+    # returns the squares byColor attacks, computed with the other king lifted off
+    # the board so the squares behind it along a checking ray count as attacked
+    def getAttackMap(self, byColor):
+        attackMap = self.attackMaps[byColor]
+        if attackMap is None:
+            attackMap = self.computeAttackMap(byColor)
+            self.attackMaps[byColor] = attackMap
+        return attackMap
+
+    def computeAttackMap(self, byColor):
+        bitboards = self.bitboards
+        occupancy = ((self.occupancy[WHITE] | self.occupancy[BLACK])
+                     & ~bitboards[makePiece(1 - byColor, KING)])
+        # pawns all at once: white steps to square - 8, black to square + 8
+        pawns = bitboards[makePiece(byColor, PAWN)]
+        if byColor == WHITE:
+            attacks = ((pawns & NOT_COL_0) >> 9) | ((pawns & NOT_COL_7) >> 7)
+        else:
+            attacks = (((pawns & NOT_COL_0) << 7) | ((pawns & NOT_COL_7) << 9)) & ALL_SQUARES
+        for square in iterSquares(bitboards[makePiece(byColor, KNIGHT)]):
+            attacks |= KNIGHT_ATTACKS[square]
+        for square in iterSquares(bitboards[makePiece(byColor, KING)]):
+            attacks |= KING_ATTACKS[square]
+        queens = bitboards[makePiece(byColor, QUEEN)]
+        for square in iterSquares(bitboards[makePiece(byColor, ROOK)] | queens):
+            attacks |= getRookAttacks(square, occupancy)
+        for square in iterSquares(bitboards[makePiece(byColor, BISHOP)] | queens):
+            attacks |= getBishopAttacks(square, occupancy)
+        return attacks
+
+    # returns the enemy pieces giving check to the side to move
+    def getCheckers(self):
+        if self.checkers is None:
+            kingSquare = self.kingSquares[self.sideToMove]
+            if kingSquare is None:
+                self.checkers = 0
+            else:
+                self.checkers = self.getAttackers(kingSquare, 1 - self.sideToMove)
+        return self.checkers
+
+    # returns a bitboard of the byColor pieces attacking square
+    def getAttackers(self, square, byColor, occupancy = None):
+        bitboards = self.bitboards
+        if occupancy is None:
+            occupancy = self.occupancy[WHITE] | self.occupancy[BLACK]
+        queens = bitboards[makePiece(byColor, QUEEN)]
+        return ((PAWN_ATTACKS[1 - byColor][square] & bitboards[makePiece(byColor, PAWN)])
+                | (KNIGHT_ATTACKS[square] & bitboards[makePiece(byColor, KNIGHT)])
+                | (KING_ATTACKS[square] & bitboards[makePiece(byColor, KING)])
+                | (getRookAttacks(square, occupancy)
+                   & (bitboards[makePiece(byColor, ROOK)] | queens))
+                | (getBishopAttacks(square, occupancy)
+                   & (bitboards[makePiece(byColor, BISHOP)] | queens)))
+
+    # returns True if color's king is attacked
+    def isChecked(self, color):
+        if color == self.sideToMove:
+            return self.getCheckers() != 0
+        kingSquare = self.kingSquares[color]
+        if kingSquare is None:
+            return False
+        return self.isSquareAttacked(kingSquare, 1 - color)
+
+    # returns {pinned square: squares it may still move to} for color's pieces
+    # pinned to their king by an enemy slider
+    def getPinMasks(self, color):
+        pins = {}
+        kingSquare = self.kingSquares[color]
+        if kingSquare is None:
+            return pins
+        bitboards = self.bitboards
+        enemy = 1 - color
+        occupancy = self.occupancy[WHITE] | self.occupancy[BLACK]
+        queens = bitboards[makePiece(enemy, QUEEN)]
+        # enemy sliders that would see the king on an empty board
+        snipers = ((getRookAttacks(kingSquare, 0) & (bitboards[makePiece(enemy, ROOK)] | queens))
+                   | (getBishopAttacks(kingSquare, 0)
+                      & (bitboards[makePiece(enemy, BISHOP)] | queens)))
+        for sniper in iterSquares(snipers):
+            between = BETWEEN[kingSquare][sniper]
+            blockers = between & occupancy
+            # exactly one blocker, and it is ours
+            if blockers and blockers & (blockers - 1) == 0 and blockers & self.occupancy[color]:
+                pins[blockers.bit_length() - 1] = between | (1 << sniper)
+        return pins
+
+    # static exchange evaluation: returns the material (PIECE_VALUES units) the
+    # side making the capture move wins once both sides have recaptured on its
+    # target square with their cheapest attacker, each free to stop when
+    # recapturing would lose material (pins are ignored)
+    def getExchangeValue(self, move):
+        fromSquare, toSquare = moveFrom(move), moveTo(move)
+        bitboards = self.bitboards
+        gains = [PIECE_VALUES.get(self.board[toSquare] & 7, 0)]
+        attackerValue = PIECE_VALUES[self.board[fromSquare] & 7]
+        occupancy = (self.occupancy[WHITE] | self.occupancy[BLACK]) & ~(1 << fromSquare)
+        color = 1 - (self.board[fromSquare] >> 3)
+        while True:
+            # removed pieces stay in the bitboards, so mask with occupancy;
+            # sliders behind them are found through the reduced occupancy
+            attackers = self.getAttackers(toSquare, color, occupancy) & occupancy
+            if attackers == 0:
+                break
+            for pieceType in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+                pieces = attackers & bitboards[makePiece(color, pieceType)]
+                if pieces:
+                    break
+            # the king may only recapture if nothing can take it back
+            if (pieceType == KING and
+                self.getAttackers(toSquare, 1 - color, occupancy) & occupancy):
+                break
+            gains.append(attackerValue - gains[-1])
+            attackerValue = PIECE_VALUES[pieceType]
+            occupancy &= ~(pieces & -pieces)
+            color = 1 - color
+        # each side picks the better of recapturing or standing pat
+        for idx in range(len(gains) - 1, 0, -1):
+            gains[idx - 1] = -max(-gains[idx - 1], gains[idx])
+        return gains[0]
+
+    ########################
+    # MOVE GENERATION
+    ########################
+
+    # appends moves of color's non-king pieces whose targets are in targetMask
+    # (and in their pin mask, for pinned pieces)
+    def addPieceMoves(self, moves, color, targetMask, pins):
+        board = self.board
+        ownOccupancy = self.occupancy[color]
+        enemyOccupancy = self.occupancy[1 - color]
+        occupancy = ownOccupancy | enemyOccupancy
+        for square in iterSquares(ownOccupancy):
+            pieceType = board[square] & 7
+            if pieceType == KING:
+                continue
+            mask = targetMask
+            if square in pins:
+                mask &= pins[square]
+            if pieceType == PAWN:
+                # single push, then double push for a pawn that has not moved
+                for target in iterSquares(PAWN_PUSHES[color][square]):
+                    if board[target] == 0:
+                        if (mask >> target) & 1:
+                            moves.append(encodeMove(square, target))
+                        if (self.unmoved >> square) & 1:
+                            for doubleTarget in iterSquares(PAWN_PUSHES[color][target] & mask):
+                                if board[doubleTarget] == 0:
+                                    moves.append(encodeMove(square, doubleTarget))
+                targets = PAWN_ATTACKS[color][square] & enemyOccupancy
+            elif pieceType == KNIGHT:
+                targets = KNIGHT_ATTACKS[square] & ~ownOccupancy
+            elif pieceType == ROOK:
+                targets = getRookAttacks(square, occupancy) & ~ownOccupancy
+            elif pieceType == BISHOP:
+                targets = getBishopAttacks(square, occupancy) & ~ownOccupancy
+            else:
+                targets = getQueenAttacks(square, occupancy) & ~ownOccupancy
+            for target in iterSquares(targets & mask):
+                moves.append(encodeMove(square, target))
+
+    # returns moves for the side to move ignoring whether they leave the king in check
+    def getPseudoMoves(self):
+        color = self.sideToMove
+        moves = []
+        self.addPieceMoves(moves, color, ALL_SQUARES, {})
+        kingSquare = self.kingSquares[color]
+        if kingSquare is not None:
+            for target in iterSquares(KING_ATTACKS[kingSquare] & ~self.occupancy[color]):
+                moves.append(encodeMove(kingSquare, target))
+            if not self.isChecked(color):
+                moves.extend(self.getCastleMoves())
+        return moves
+
+    # returns the castling moves for the side to move, which must not be in check
+    def getCastleMoves(self):
+        color = self.sideToMove
+        kingSquare = self.kingSquares[color]
+        moves = []
+        if kingSquare is None or self.castling == 0:
+            return moves
+        occupancy = self.occupancy[WHITE] | self.occupancy[BLACK]
+        rook = makePiece(color, ROOK)
+        for direction in (1, -1):
+            if not self.castling & getCastleRight(color, direction):
+                continue
+            rookSquare = (kingSquare & ~7) + (7 if direction > 0 else 0)
+            # the rook must be home with every square up to the king empty
+            if self.board[rookSquare] != rook or BETWEEN[kingSquare][rookSquare] & occupancy:
+                continue
+            # king may not castle through or into check
+            if (self.isSquareAttacked(kingSquare + direction, 1 - color)
+                or self.isSquareAttacked(kingSquare + 2 * direction, 1 - color)):
+                continue
+            moves.append(encodeMove(kingSquare, kingSquare + 2 * direction))
+        return moves
+
+    # returns all legal moves for the side to move, found from the checkers and
+    # pinned pieces instead of by trying each move; with capturesOnly, just the
+    # moves that take a piece
+    def getLegalMoves(self, capturesOnly = False):
+        color = self.sideToMove
+        kingSquare = self.kingSquares[color]
+        if kingSquare is None:
+            moves = self.getPseudoMoves()
+            if capturesOnly:
+                moves = [move for move in moves if self.board[moveTo(move)] != 0]
+            return moves
+        enemy = 1 - color
+        moves = []
+        captureMask = self.occupancy[enemy] if capturesOnly else ALL_SQUARES
+
+        # the king may go anywhere the enemy does not attack (the attack map
+        # already treats the king as lifted off its square)
+        kingTargets = KING_ATTACKS[kingSquare] & ~self.occupancy[color] & captureMask
+        if kingTargets:
+            kingTargets &= ~self.getAttackMap(enemy)
+        for target in iterSquares(kingTargets):
+            moves.append(encodeMove(kingSquare, target))
+
+        checkers = self.getCheckers()
+        if checkers == 0:
+            targetMask = captureMask
+            if not capturesOnly:
+                moves.extend(self.getCastleMoves())
+        elif checkers & (checkers - 1) == 0:
+            # single check: capture the checker or block between it and the king
+            checker = checkers.bit_length() - 1
+            targetMask = (checkers | BETWEEN[kingSquare][checker]) & captureMask
+        else:
+            # double check: only the king can move
+            return moves
+
+        if targetMask:
+            self.addPieceMoves(moves, color, targetMask, self.getPinMasks(color))
+        return moves
+
+    ########################
+    # MAKING MOVES
+    ########################
+
+    def removePiece(self, square):
+        piece = self.board[square]
+        bit = 1 << square
+        self.board[square] = 0
+        self.bitboards[piece] ^= bit
+        self.occupancy[piece >> 3] ^= bit
+        self.mgScore -= MG_SCORES[piece][square]
+        self.egScore -= EG_SCORES[piece][square]
+        self.phase -= PIECE_PHASES[piece]
+        return piece
+
+    def putPiece(self, piece, square):
+        bit = 1 << square
+        self.board[square] = piece
+        self.bitboards[piece] |= bit
+        self.occupancy[piece >> 3] |= bit
+        self.mgScore += MG_SCORES[piece][square]
+        self.egScore += EG_SCORES[piece][square]
+        self.phase += PIECE_PHASES[piece]
+
+    # plays move on this position in place, pushing what unmakeMove needs
+    def makeMove(self, move):
+        fromSquare, toSquare = move & 63, (move >> 6) & 63
+        color = self.sideToMove
+        captured = self.board[toSquare]
+        hash = self.getHash()
+        oldCastling = self.castling
+        # undo record: captured piece, castling rights, moved flags and hash in one int
+        self.undoStack.append(captured | (oldCastling << 4) | (self.unmoved << 8) | (hash << 72))
+        self.attackStack.append((self.checkers, self.attackMaps))
+
+        piece = self.removePiece(fromSquare)
+        hash ^= ZOBRIST_PIECES[piece][fromSquare] ^ ZOBRIST_PIECES[piece][toSquare]
+        if captured != 0:
+            self.removePiece(toSquare)
+            hash ^= ZOBRIST_PIECES[captured][toSquare]
+            if captured & 7 == PAWN and (self.unmoved >> toSquare) & 1:
+                hash ^= ZOBRIST_UNMOVED_PAWNS[toSquare]
+        self.putPiece(piece, toSquare)
+
+        if piece & 7 == PAWN:
+            if (self.unmoved >> fromSquare) & 1:
+                hash ^= ZOBRIST_UNMOVED_PAWNS[fromSquare]
+        elif piece & 7 == KING:
+            self.kingSquares[color] = toSquare
+            self.castling &= ~(getCastleRight(color, 1) | getCastleRight(color, -1))
+            # castling also moves the rook next to the king
+            if toSquare - fromSquare == 2 or fromSquare - toSquare == 2:
+                rookFrom, rookTo = getCastleRookSquares(fromSquare, toSquare)
+                rook = self.removePiece(rookFrom)
+                self.putPiece(rook, rookTo)
+                hash ^= ZOBRIST_PIECES[rook][rookFrom] ^ ZOBRIST_PIECES[rook][rookTo]
+                self.unmoved &= ~(1 << rookFrom)
+
+        # moving a rook off, or capturing a rook on, its corner removes that castle
+        self.castling &= CASTLE_MASKS[fromSquare] & CASTLE_MASKS[toSquare]
+        self.unmoved &= ~((1 << fromSquare) | (1 << toSquare))
+        self.sideToMove = 1 - color
+        self.hash = (hash ^ ZOBRIST_CASTLING[oldCastling] ^ ZOBRIST_CASTLING[self.castling]
+                     ^ ZOBRIST_BLACK_TO_MOVE)
+
+        # recomputed on first query at the new node, restored on unmake
+        self.checkers = None
+        self.attackMaps = [None, None]
+
+    # takes back move, which must be the last move made on this position
+    def unmakeMove(self, move):
+        fromSquare, toSquare = move & 63, (move >> 6) & 63
+        record = self.undoStack.pop()
+        color = 1 - self.sideToMove
+        self.sideToMove = color
+
+        piece = self.removePiece(toSquare)
+        self.putPiece(piece, fromSquare)
+        captured = record & 15
+        if captured != 0:
+            self.putPiece(captured, toSquare)
+
+        if piece & 7 == KING:
+            self.kingSquares[color] = fromSquare
+            if toSquare - fromSquare == 2 or fromSquare - toSquare == 2:
+                rookFrom, rookTo = getCastleRookSquares(fromSquare, toSquare)
+                self.putPiece(self.removePiece(rookTo), rookFrom)
+
+        self.castling = (record >> 4) & 15
+        self.unmoved = (record >> 8) & ALL_SQUARES
+        self.hash = record >> 72
+        self.checkers, self.attackMaps = self.attackStack.pop()
+
+    # passes the turn without moving, for null-move pruning; the side to move
+    # must not be in check
+    def makeNullMove(self):
+        hash = self.getHash()
+        # the undo record of a null move is just the hash
+        self.undoStack.append(hash)
+        self.attackStack.append((self.checkers, self.attackMaps))
+        self.sideToMove = 1 - self.sideToMove
+        self.hash = hash ^ ZOBRIST_BLACK_TO_MOVE
+        # the board is unchanged, so only the checkers need recomputing
+        self.checkers = None
+
+    def unmakeNullMove(self):
+        self.sideToMove = 1 - self.sideToMove
+        self.hash = self.undoStack.pop()
+        self.checkers, self.attackMaps = self.attackStack.pop()
+
+# Zobrist keys come from a fixed seed so hashes agree between processes and runs
+zobristRandom = random.Random(0x112)
+ZOBRIST_PIECES = [[zobristRandom.getrandbits(64) for square in range(64)]
+                  for piece in range(16)]
+# unmoved pawns can still double step, so they hash differently from moved ones
+ZOBRIST_UNMOVED_PAWNS = [zobristRandom.getrandbits(64) for square in range(64)]
+ZOBRIST_CASTLING = [zobristRandom.getrandbits(64) for castling in range(16)]
+ZOBRIST_BLACK_TO_MOVE = zobristRandom.getrandbits(64)
+
+# returns (rookFrom, rookTo) for the king castling from kingFrom to kingTo
+def getCastleRookSquares(kingFrom, kingTo):
+    if kingTo > kingFrom:
+        return ((kingFrom & ~7) + 7, kingTo - 1)
+    return (kingFrom & ~7, kingTo + 1)
+
+# castling rights kept when a piece moves from or to each square
+CASTLE_MASKS = [15] * 64
+CASTLE_MASKS[rowColToSquare(7, 7)] = 15 & ~CASTLE_WHITE_KING
+CASTLE_MASKS[rowColToSquare(7, 0)] = 15 & ~CASTLE_WHITE_QUEEN
+CASTLE_MASKS[rowColToSquare(0, 7)] = 15 & ~CASTLE_BLACK_KING
+CASTLE_MASKS[rowColToSquare(0, 0)] = 15 & ~CASTLE_BLACK_QUEEN
+
+# returns the standard starting position
+def getStartPosition():
+    position = Position()
+    backRank = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+    for col in range(8):
+        position.addPiece(BLACK, backRank[col], rowColToSquare(0, col), False)
+        position.addPiece(BLACK, PAWN, rowColToSquare(1, col), False)
+        position.addPiece(WHITE, PAWN, rowColToSquare(6, col), False)
+        position.addPiece(WHITE, backRank[col], rowColToSquare(7, col), False)
+    position.castling = (CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN |
+                         CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN)
+    return position
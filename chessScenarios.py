@@ -0,0 +1,70 @@
+#################################################
+# chessScenarios.py
+#
+# Test positions loaded by the number keys (see keyPressed)
+#################################################
+
+from chessPosition import (Position, WHITE, BLACK, PAWN, KNIGHT, BISHOP,
+                           ROOK, QUEEN, KING, CASTLE_WHITE_KING,
+                           CASTLE_BLACK_QUEEN, getStartPosition,
+                           rowColToSquare, encodeMove)
+
+# (color, pieceType, row, col, moved) for every piece of each position
+SCENARIO_PIECES = {
+    # knight-queen mate
+    "1": [(WHITE, KNIGHT, 3, 3, False), (WHITE, QUEEN, 1, 2, False),
+          (WHITE, KING, 7, 4, True), (BLACK, KING, 0, 4, True)],
+    # backrank mate (against black)
+    "3": [(WHITE, QUEEN, 7, 3, False), (WHITE, KING, 7, 4, True),
+          (BLACK, KING, 0, 6, True), (BLACK, PAWN, 1, 5, False),
+          (BLACK, PAWN, 1, 6, False), (BLACK, PAWN, 1, 7, False)],
+    # two-rook mate (against white)
+    "4": [(WHITE, KING, 7, 1, True), (BLACK, KING, 0, 4, True),
+          (BLACK, ROOK, 5, 3, True), (BLACK, ROOK, 6, 6, True)],
+    # backrank check (not mate)
+    "6": [(WHITE, QUEEN, 7, 3, False), (WHITE, KING, 7, 4, True),
+          (WHITE, BISHOP, 4, 2, False), (BLACK, KING, 0, 6, True),
+          (BLACK, PAWN, 1, 5, False), (BLACK, PAWN, 1, 6, False),
+          (BLACK, PAWN, 2, 7, False)],
+    # simple black check white using queen (with mate in 2)
+    "7": [(BLACK, KNIGHT, 4, 3, False), (BLACK, QUEEN, 1, 2, False),
+          (BLACK, KING, 0, 4, True), (WHITE, KING, 7, 3, True),
+          (WHITE, ROOK, 7, 0, True)],
+    # black king far-side castle demonstration
+    "8": [(BLACK, ROOK, 0, 0, False), (BLACK, QUEEN, 1, 2, False),
+          (BLACK, KING, 0, 4, False), (WHITE, KING, 6, 3, True)],
+    # white king near-side castle demonstration
+    "9": [(BLACK, KING, 0, 4, True), (WHITE, KING, 7, 4, False),
+          (WHITE, QUEEN, 7, 3, False), (WHITE, ROOK, 7, 7, False)],
+}
+
+SCENARIO_SIDE_TO_MOVE = {"7": BLACK, "8": BLACK}
+SCENARIO_CASTLING = {"8": CASTLE_BLACK_QUEEN, "9": CASTLE_WHITE_KING}
+
+# ((fromRow, fromCol), (toRow, toCol)) moves played from the starting position
+SCENARIO_MOVES = {
+    # fool's mate (against white)
+    "2": [((6, 5), (5, 5)), ((1, 4), (3, 4)), ((6, 6), (4, 6))],
+    # simple check with bishop
+    "5": [((6, 4), (4, 4)), ((1, 3), (3, 3))],
+}
+
+SCENARIO_KEYS = "0123456789"
+
+# returns the position loaded by pressing key
+def getScenarioPosition(key):
+    if key in SCENARIO_PIECES:
+        position = Position()
+        for (color, pieceType, row, col, moved) in SCENARIO_PIECES[key]:
+            position.addPiece(color, pieceType, rowColToSquare(row, col), moved)
+        position.sideToMove = SCENARIO_SIDE_TO_MOVE.get(key, WHITE)
+        position.castling = SCENARIO_CASTLING.get(key, 0)
+        return position
+
+    position = getStartPosition()
+    for ((fromRow, fromCol), (toRow, toCol)) in SCENARIO_MOVES.get(key, []):
+        position.makeMove(encodeMove(rowColToSquare(fromRow, fromCol),
+                                     rowColToSquare(toRow, toCol)))
+    # scenario moves are never taken back
+    position.undoStack = []
+    return position
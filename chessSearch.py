@@ -0,0 +1,866 @@
+#################################################
+# chessSearch.py
+#
+# Alpha-beta search over chessPosition.Position
+#################################################
+
+import time
+from array import array
+from chessPosition import (BLACK, KNIGHT, BISHOP, ROOK, QUEEN, PIECE_VALUES,
+                           makePiece, pieceType, moveFrom, moveTo)
+from chessBatchEvaluation import BatchEvaluator, evaluateWithMobility
+
+#################################################
+# SCORES
+#################################################
+
+# scores are in hundredths of a pawn, from the side to move's point of view
+PAWN_SCORE = 100
+MATE_SCORE = 100000
+# any score beyond this is a forced mate
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+DRAW_SCORE = 0
+
+# returns the static score of position for the side to move: material and
+# piece-square tables blended by game phase, kept up to date by the position
+# as moves are made and unmade (see chessEvaluation.py)
+def evaluate(position):
+    if position.sideToMove == BLACK:
+        return -position.getEvaluation()
+    return position.getEvaluation()
+
+#################################################
+# TRANSPOSITION TABLE
+#################################################
+
+BOUND_EXACT, BOUND_LOWER, BOUND_UPPER = 1, 2, 3
+
+# entries are two 64-bit words: the position hash and the packed data
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 20
+
+# packs one entry's data into an int (bound is never 0, so 0 means empty)
+def packEntry(depth, score, bound, move, age):
+    return ((move & 0xFFF) | ((depth & 0xFF) << 12) | (bound << 20) |
+            ((age & 0xFF) << 22) | ((score + SCORE_OFFSET) << 30))
+
+# returns (depth, score, bound, move) from packed data
+def unpackEntry(data):
+    return ((data >> 12) & 0xFF, (data >> 30) - SCORE_OFFSET,
+            (data >> 20) & 3, data & 0xFFF)
+
+# mate scores are stored relative to the node so they stay right at other plies
+def scoreToTable(score, ply):
+    if score > MATE_BOUND:
+        return score + ply
+    elif score < -MATE_BOUND:
+        return score - ply
+    return score
+
+def scoreFromTable(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    elif score < -MATE_BOUND:
+        return score + ply
+    return score
+
+class TranspositionTable(object):
+    def __init__(self, sizeMB = 16):
+        self.numEntries = max(1, (sizeMB * 1024 * 1024) // ENTRY_BYTES)
+        self.keys = array("Q", bytes(8 * self.numEntries))
+        self.data = array("Q", bytes(8 * self.numEntries))
+        self.age = 0
+        self.resetStats()
+
+    def resetStats(self):
+        self.probes = 0
+        self.hits = 0
+        # probes that found a different position in the slot
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def clear(self):
+        for idx in range(self.numEntries):
+            self.writeSlot(idx, 0, 0)
+        self.age = 0
+
+    # called once per root search, so entries from earlier searches age out
+    def newSearch(self):
+        self.age = (self.age + 1) & 0xFF
+
+    # returns (hash, data) stored in slot idx (data 0 for an empty slot)
+    def readSlot(self, idx):
+        return self.keys[idx], self.data[idx]
+
+    def writeSlot(self, idx, hash, data):
+        self.keys[idx] = hash
+        self.data[idx] = data
+
+    # returns (depth, score, bound, move) stored for hash, or None
+    def probe(self, hash):
+        self.probes += 1
+        key, data = self.readSlot(hash % self.numEntries)
+        if data == 0:
+            return None
+        if key != hash:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return unpackEntry(data)
+
+    # depth-preferred replacement: keep a deeper entry from the current search
+    def store(self, hash, depth, score, bound, move):
+        idx = hash % self.numEntries
+        oldKey, oldData = self.readSlot(idx)
+        if oldData != 0 and oldKey != hash:
+            oldDepth = (oldData >> 12) & 0xFF
+            oldAge = (oldData >> 22) & 0xFF
+            if oldAge == self.age and oldDepth > depth:
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.writeSlot(idx, hash, packEntry(depth, score, bound, move, self.age))
+
+    # returns a dict of the counters for reporting
+    def getStats(self):
+        return {"probes": self.probes, "hits": self.hits,
+                "collisions": self.collisions, "stores": self.stores,
+                "overwrites": self.overwrites}
+
+#################################################
+# MOVE ORDERING
+#################################################
+
+# ChessPiece value of each piece code (0 for an empty square)
+PIECE_CODE_VALUES = [PIECE_VALUES.get(pieceType(piece), 0) for piece in range(16)]
+
+# ordering scores: hash/PV move, then captures, killers, quiet moves by history
+# and last the captures that lose material in the exchange
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORE = 1 << 22
+LOSING_CAPTURE_SCORE = -(1 << 24)
+# history scores are halved once one reaches this, so they stay below the killers
+HISTORY_MAX = 1 << 20
+
+#################################################
+# SEARCH
+#################################################
+
+# delta pruning skips a capture if even winning the victim plus this margin
+# cannot lift the stand-pat score to alpha
+DELTA_MARGIN = 2 * PAWN_SCORE
+
+# half-width of the root aspiration window; doubled on each failed search
+ASPIRATION_WINDOW = PAWN_SCORE // 2
+
+# null-move pruning searches the passed position this many plies shallower,
+# and only at nodes with at least NULL_MOVE_MIN_DEPTH plies left
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# late move reductions: quiet moves after the first LMR_MIN_MOVES are searched
+# one ply shallower at nodes with at least LMR_MIN_DEPTH plies left
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+
+# futility pruning: at depth 1 or 2, quiet moves are skipped when the static
+# score plus the margin for that depth (a minor piece, a rook) is below alpha
+FUTILITY_MARGINS = (0, PIECE_VALUES[BISHOP] * PAWN_SCORE, PIECE_VALUES[ROOK] * PAWN_SCORE)
+
+# razoring: at depth 1 to 3, a node whose static score plus the margin is below
+# alpha is settled by quiescence search alone if that also stays below alpha
+RAZOR_MARGINS = (0, PIECE_VALUES[BISHOP] * PAWN_SCORE, PIECE_VALUES[ROOK] * PAWN_SCORE,
+                 PIECE_VALUES[QUEEN] * PAWN_SCORE)
+
+# a time-sliced search pauses only between nodes more than SLICE_LEAF_DEPTH
+# plies from the leaves, and by default runs SLICE_TIME seconds per slice
+SLICE_LEAF_DEPTH = 1
+SLICE_TIME = 0.02
+
+# deepest ply the search recurses to (checks extend past the nominal depth)
+MAX_PLY = 128
+# nodes between checks of the time and node budget
+LIMIT_CHECK_INTERVAL = 256
+
+class Search(object):
+    def __init__(self, ttSizeMB = 16, useTranspositionTable = True,
+                 useMoveOrdering = True, useQuiescence = True, usePVS = True,
+                 useAspiration = True, useNullMove = True, useLMR = True,
+                 useFutility = True, useRazoring = True, useSEE = True,
+                 useBatchEvaluation = False, transpositionTable = None, tablebase = None):
+        # an existing table (such as a shared one) replaces a new ttSizeMB one
+        if transpositionTable == None:
+            transpositionTable = TranspositionTable(ttSizeMB)
+        self.tt = transpositionTable
+        # endgame tables (see chessTablebase.py) for exact scores, or None
+        self.tablebase = tablebase
+        self.useTranspositionTable = useTranspositionTable
+        self.useMoveOrdering = useMoveOrdering
+        self.useQuiescence = useQuiescence
+        self.usePVS = usePVS
+        self.useAspiration = useAspiration
+        self.useNullMove = useNullMove
+        self.useLMR = useLMR
+        self.useFutility = useFutility
+        self.useRazoring = useRazoring
+        self.useSEE = useSEE
+        # batched evaluation scores the children of depth 1 nodes together
+        # (see chessBatchEvaluation.py); it adds mobility to the evaluation,
+        # so every other node is scored with mobility too
+        self.useBatchEvaluation = useBatchEvaluation
+        self.evaluate = evaluateWithMobility if useBatchEvaluation else evaluate
+        self.batchEvaluator = BatchEvaluator()
+        # batchScores[ply] maps the hashes of the positions a batch scored at
+        # ply to their scores, or is None
+        self.batchScores = [None] * (MAX_PLY + 2)
+        self.deltaMargin = DELTA_MARGIN
+        self.aspirationWindow = ASPIRATION_WINDOW
+        self.nullMoveReduction = NULL_MOVE_REDUCTION
+        self.nullMoveMinDepth = NULL_MOVE_MIN_DEPTH
+        self.lmrMinDepth = LMR_MIN_DEPTH
+        self.lmrMinMoves = LMR_MIN_MOVES
+        # indexed by depth; a depth past the end of the list is never pruned
+        self.futilityMargins = list(FUTILITY_MARGINS)
+        self.razorMargins = list(RAZOR_MARGINS)
+        self.resetStats()
+        self.timeLimit = None
+        self.nodeLimit = None
+        self.startTime = 0
+        self.stopped = False
+        self.isCancelled = False
+        # time-sliced search state (see startSlicedSearch)
+        self.isSliced = False
+        self.slicedSearch = None
+        self.sliceNodes = None
+        self.sliceTime = None
+        self.sliceEndNodes = None
+        self.sliceEndTime = None
+        self.sliceLatencies = []
+        self.completedDepth = 0
+        # principal variation of the last completed iteration
+        self.pv = []
+        self.isFollowingPV = False
+        # pvTable[ply] is the best line found from the node at ply
+        self.pvTable = [[] for ply in range(MAX_PLY + 1)]
+        # two quiet moves per ply that caused cutoffs in sibling nodes
+        self.killers = [[0, 0] for ply in range(MAX_PLY + 1)]
+        # history[move] grows with the depth of cutoffs the quiet move caused
+        self.history = [0] * 4096
+
+    def resetStats(self):
+        self.nodes = 0
+        # nodes searched by quiesce (also counted in self.nodes)
+        self.quiescenceNodes = 0
+        # fail-high counts; a high share of first-move cutoffs means good ordering
+        self.betaCutoffs = 0
+        self.firstMoveCutoffs = 0
+        # zero-window searches that failed high and were searched again
+        self.pvsResearches = 0
+        # root searches that fell outside the aspiration window
+        self.aspirationResearches = 0
+        self.nullMoveCutoffs = 0
+        self.lmrReductions = 0
+        # reduced searches that beat alpha and were searched again at full depth
+        self.lmrResearches = 0
+        self.futilityPrunes = 0
+        self.razorCutoffs = 0
+        # losing captures skipped by quiescence search
+        self.seePrunes = 0
+        # nodes scored by the endgame tablebases instead of searched
+        self.tablebaseHits = 0
+        # positions scored in batches, and how many of those were used
+        self.batchedPositions = 0
+        self.batchHits = 0
+
+    # sorts moves in place: firstMove, captures by most valuable victim then
+    # least valuable attacker, killer moves, quiet moves by history, then the
+    # captures static exchange evaluation says lose material
+    def orderMoves(self, position, moves, firstMove, ply):
+        board = position.board
+        killers = self.killers[ply]
+        history = self.history
+        scores = {}
+        for move in moves:
+            victim = board[moveTo(move)]
+            if move == firstMove:
+                scores[move] = HASH_MOVE_SCORE
+            elif victim != 0:
+                attacker = board[moveFrom(move)]
+                score = PIECE_CODE_VALUES[victim] * 64 - PIECE_CODE_VALUES[attacker]
+                # taking something worth less than the attacker can lose material
+                if (self.useSEE and PIECE_CODE_VALUES[victim] < PIECE_CODE_VALUES[attacker]
+                    and position.getExchangeValue(move) < 0):
+                    scores[move] = LOSING_CAPTURE_SCORE + score
+                else:
+                    scores[move] = CAPTURE_SCORE + score
+            elif move == killers[0]:
+                scores[move] = KILLER_SCORE
+            elif move == killers[1]:
+                scores[move] = KILLER_SCORE - 1
+            else:
+                scores[move] = history[move]
+        moves.sort(key = scores.__getitem__, reverse = True)
+
+    # records a quiet move that caused a beta cutoff at ply
+    def updateQuietCutoff(self, move, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] += depth * depth
+        if self.history[move] >= HISTORY_MAX:
+            self.history = [score // 2 for score in self.history]
+
+    # returns the share of beta cutoffs caused by the first move searched
+    def getFirstMoveCutoffRate(self):
+        if self.betaCutoffs == 0:
+            return 0
+        return self.firstMoveCutoffs / self.betaCutoffs
+
+    # asks a search running in another thread to stop; the caller clears
+    # isCancelled before starting the next search
+    def cancel(self):
+        self.isCancelled = True
+
+    # sets self.stopped once the time or node budget is used up or the
+    # search is cancelled
+    def checkLimits(self):
+        if self.isCancelled:
+            self.stopped = True
+        elif self.nodeLimit != None and self.nodes >= self.nodeLimit:
+            self.stopped = True
+        elif (self.timeLimit != None and
+              time.perf_counter() - self.startTime >= self.timeLimit):
+            self.stopped = True
+
+    # returns the static score of position at ply, from the batch its parent
+    # scored if it was in one
+    def getStaticScore(self, position, ply):
+        scores = self.batchScores[ply]
+        if scores != None:
+            score = scores.get(position.getHash())
+            if score != None:
+                self.batchHits += 1
+                return score
+        return self.evaluate(position)
+
+    # scores the children of position after moves in one batch; returns
+    # their scores by hash
+    def getBatchScores(self, position, moves):
+        hashes = []
+        for move in moves:
+            position.makeMove(move)
+            hashes.append(position.getHash())
+            self.batchEvaluator.add(position)
+            position.unmakeMove(move)
+        self.batchedPositions += len(moves)
+        return dict(zip(hashes, self.batchEvaluator.scoreBatch()))
+
+    # quiescence search: from a leaf, keeps searching captures (and every
+    # evasion when in check) so the score is never taken mid-exchange
+    def quiesce(self, position, alpha, beta, ply):
+        self.nodes += 1
+        self.quiescenceNodes += 1
+        if self.nodes % LIMIT_CHECK_INTERVAL == 0:
+            self.checkLimits()
+        if self.stopped:
+            return 0
+        isChecked = position.isChecked(position.sideToMove)
+        if ply >= MAX_PLY:
+            return self.getStaticScore(position, ply)
+
+        if isChecked:
+            moves = position.getLegalMoves()
+            if moves == []:
+                return -MATE_SCORE + ply
+            standPat = bestScore = -INFINITY
+        else:
+            # stand pat: the side to move can decline every capture
+            standPat = bestScore = self.getStaticScore(position, ply)
+            if standPat >= beta:
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            moves = position.getLegalMoves(capturesOnly = True)
+        if self.useMoveOrdering:
+            self.orderMoves(position, moves, 0, ply)
+
+        board = position.board
+        for move in moves:
+            if not isChecked:
+                victimValue = PIECE_CODE_VALUES[board[moveTo(move)]]
+                if standPat + victimValue * PAWN_SCORE + self.deltaMargin <= alpha:
+                    continue
+                # captures that lose material in the exchange are not worth resolving
+                if (self.useSEE and victimValue < PIECE_CODE_VALUES[board[moveFrom(move)]]
+                    and position.getExchangeValue(move) < 0):
+                    self.seePrunes += 1
+                    continue
+            position.makeMove(move)
+            score = -self.quiesce(position, -beta, -alpha, ply + 1)
+            position.unmakeMove(move)
+            if self.stopped:
+                return 0
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return bestScore
+
+    # returns True if color has a piece other than pawns and its king; with
+    # only pawns left, passing can be the best move (zugzwang)
+    def hasNonPawnMaterial(self, position, color):
+        bitboards = position.bitboards
+        return (bitboards[makePiece(color, KNIGHT)] | bitboards[makePiece(color, BISHOP)]
+                | bitboards[makePiece(color, ROOK)] | bitboards[makePiece(color, QUEEN)]) != 0
+
+    # returns how many plies shallower to search the moveIdx-th move at a node
+    # of depth; captures, checks, killers and moves out of check are not reduced
+    def getLateMoveReduction(self, position, depth, moveIdx, move, isCapture,
+                             isChecked, ply):
+        if (not self.useLMR or depth < self.lmrMinDepth or moveIdx < self.lmrMinMoves
+            or isCapture or isChecked or move in self.killers[ply]):
+            return 0
+        # position already has move made: does it give check?
+        if position.isChecked(position.sideToMove):
+            return 0
+        if depth >= 6 and moveIdx >= 3 * self.lmrMinMoves:
+            return 2
+        return 1
+
+    # the start of every node, up to the transposition table: returns
+    # (score, isChecked, hash, hashMove), where a score other than None
+    # settles the node without searching it
+    def probeNode(self, position, depth, alpha, beta, ply):
+        self.pvTable[ply] = []
+        self.nodes += 1
+        if self.nodes % LIMIT_CHECK_INTERVAL == 0:
+            self.checkLimits()
+        if self.stopped:
+            return 0, False, None, 0
+        # the tablebases know the exact score (the root picks its move from
+        # them directly, see iterateDeepening)
+        if self.tablebase != None and ply > 0:
+            score = self.tablebase.probe(position, ply)
+            if score != None:
+                self.tablebaseHits += 1
+                return score, False, None, 0
+        isChecked = position.isChecked(position.sideToMove)
+        if (depth <= 0 and not isChecked) or ply >= MAX_PLY:
+            return self.getStaticScore(position, ply), isChecked, None, 0
+
+        hash = None
+        hashMove = 0
+        if self.useTranspositionTable:
+            hash = position.getHash()
+            entry = self.tt.probe(hash)
+            if entry != None:
+                entryDepth, entryScore, bound, hashMove = entry
+                entryScore = scoreFromTable(entryScore, ply)
+                # no cutoffs at the root, which has to produce a move
+                if entryDepth >= depth and ply > 0:
+                    if (bound == BOUND_EXACT
+                        or (bound == BOUND_LOWER and entryScore >= beta)
+                        or (bound == BOUND_UPPER and entryScore <= alpha)):
+                        return entryScore, isChecked, hash, hashMove
+        return None, isChecked, hash, hashMove
+
+    # the forward pruning tried before a node's moves (only at non-PV nodes
+    # out of check): returns (score, staticScore, isFutile, tryNullMove),
+    # where a score other than None is the node's score after razoring
+    def pruneNode(self, position, depth, alpha, beta, ply, isChecked, allowNullMove):
+        isPVNode = beta - alpha > 1
+        canPrune = not isChecked and not isPVNode and abs(alpha) < MATE_BOUND
+        staticScore = self.getStaticScore(position, ply) if canPrune else None
+
+        # razoring: far below alpha near the leaves, only a capture could help
+        if (self.useRazoring and canPrune and depth < len(self.razorMargins)
+            and staticScore + self.razorMargins[depth] < alpha):
+            if self.useQuiescence:
+                score = self.quiesce(position, alpha - 1, alpha, ply)
+            else:
+                score = staticScore
+            if self.stopped:
+                return 0, staticScore, False, False
+            if depth == 1 or score < alpha:
+                self.razorCutoffs += 1
+                return score, staticScore, False, False
+
+        # futility pruning: quiet moves cannot lift the score to alpha
+        isFutile = (self.useFutility and canPrune and depth < len(self.futilityMargins)
+                    and staticScore + self.futilityMargins[depth] <= alpha)
+
+        # null-move pruning: if passing still scores at least beta at reduced
+        # depth, a real move would too (not tried in check, on the PV, twice
+        # in a row, or with only pawns left where passing could be best)
+        tryNullMove = (self.useNullMove and allowNullMove and canPrune
+                       and depth >= self.nullMoveMinDepth and abs(beta) < MATE_BOUND
+                       and self.hasNonPawnMaterial(position, position.sideToMove)
+                       and staticScore >= beta)
+        return None, staticScore, isFutile, tryNullMove
+
+    # puts the first move to try at the front of moves, orders the rest, and
+    # one ply above the leaves scores every child in one batch (if the quiet
+    # ones are not about to be pruned)
+    def prepareMoves(self, position, moves, hashMove, depth, ply, isFutile):
+        # try the previous iteration's line first, else the stored best move
+        firstMove = hashMove
+        if self.isFollowingPV:
+            if ply < len(self.pv) and self.pv[ply] in moves:
+                firstMove = self.pv[ply]
+            else:
+                self.isFollowingPV = False
+        if self.useMoveOrdering:
+            self.orderMoves(position, moves, firstMove, ply)
+        elif firstMove in moves:
+            moves.remove(firstMove)
+            moves.insert(0, firstMove)
+        if self.useBatchEvaluation and depth == 1 and not isFutile:
+            self.batchScores[ply + 1] = self.getBatchScores(position, moves)
+
+    # the searches of a move after the first at a node of depth at ply (the
+    # move already made): reduced by reduction plies, then with a zero window
+    # at alpha, and again with the full window if it lands inside it; yields
+    # the arguments (depth, alpha, beta, ply, allowNullMove) of each child
+    # search, is sent back the child's score, and returns the move's score;
+    # search(), searchNodeSliced and the parallel root all run it
+    def searchLateMoveSteps(self, depth, alpha, beta, ply, reduction):
+        score = alpha + 1
+        if reduction > 0:
+            self.lmrReductions += 1
+            score = -(yield (depth - 1 - reduction, -alpha - 1, -alpha, ply + 1, True))
+            if score > alpha:
+                self.lmrResearches += 1
+        if score > alpha and self.usePVS:
+            # principal variation search: prove the move is no better than
+            # alpha with a zero window, and search it fully only if it is
+            score = -(yield (depth - 1, -alpha - 1, -alpha, ply + 1, True))
+            if alpha < score < beta and not self.stopped:
+                self.pvsResearches += 1
+                score = -(yield (depth - 1, -beta, -alpha, ply + 1, True))
+        elif score > alpha:
+            score = -(yield (depth - 1, -beta, -alpha, ply + 1, True))
+        return score
+
+    # runs searchLateMoveSteps with search() doing each child search
+    def searchLateMove(self, position, depth, alpha, beta, ply, reduction):
+        steps = self.searchLateMoveSteps(depth, alpha, beta, ply, reduction)
+        score = None
+        try:
+            while True:
+                score = self.search(position, *steps.send(score))
+        except StopIteration as result:
+            return result.value
+
+    # stores a searched node's score in the transposition table
+    def storeNode(self, hash, depth, ply, bestScore, originalAlpha, beta, bestMove):
+        if bestScore >= beta:
+            bound = BOUND_LOWER
+        elif bestScore > originalAlpha:
+            bound = BOUND_EXACT
+        else:
+            bound = BOUND_UPPER
+        self.tt.store(hash, depth, scoreToTable(bestScore, ply), bound, bestMove)
+
+    # negamax alpha-beta; returns the score of position for the side to move
+    # (meaningless once self.stopped is set)
+    def search(self, position, depth, alpha, beta, ply = 0, allowNullMove = True):
+        if depth <= 0 and self.useQuiescence:
+            self.pvTable[ply] = []
+            return self.quiesce(position, alpha, beta, ply)
+        score, isChecked, hash, hashMove = self.probeNode(position, depth, alpha, beta, ply)
+        if score != None:
+            return score
+        score, staticScore, isFutile, tryNullMove = self.pruneNode(
+            position, depth, alpha, beta, ply, isChecked, allowNullMove)
+        if score != None:
+            return score
+        if tryNullMove:
+            position.makeNullMove()
+            score = -self.search(position, depth - 1 - self.nullMoveReduction,
+                                 -beta, -beta + 1, ply + 1, False)
+            position.unmakeNullMove()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                self.nullMoveCutoffs += 1
+                return beta
+
+        moves = position.getLegalMoves()
+        if moves == []:
+            if isChecked:
+                return -MATE_SCORE + ply
+            return DRAW_SCORE
+        if depth <= 0:
+            return self.getStaticScore(position, ply)
+        self.prepareMoves(position, moves, hashMove, depth, ply, isFutile)
+
+        originalAlpha = alpha
+        bestScore = -INFINITY
+        bestMove = 0
+        for (moveIdx, move) in enumerate(moves):
+            isCapture = position.board[moveTo(move)] != 0
+            position.makeMove(move)
+            if (isFutile and moveIdx > 0 and not isCapture
+                and not position.isChecked(position.sideToMove)):
+                position.unmakeMove(move)
+                self.futilityPrunes += 1
+                bestScore = max(bestScore, staticScore + self.futilityMargins[depth])
+                continue
+            if moveIdx == 0:
+                score = -self.search(position, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                reduction = self.getLateMoveReduction(position, depth, moveIdx, move,
+                                                      isCapture, isChecked, ply)
+                score = self.searchLateMove(position, depth, alpha, beta, ply, reduction)
+            position.unmakeMove(move)
+            # only the first move at each node can continue the old line
+            self.isFollowingPV = False
+            if self.stopped:
+                self.batchScores[ply + 1] = None
+                return 0
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    self.pvTable[ply] = [move] + self.pvTable[ply + 1]
+                    if alpha >= beta:
+                        self.betaCutoffs += 1
+                        if moveIdx == 0:
+                            self.firstMoveCutoffs += 1
+                        if not isCapture and self.useMoveOrdering:
+                            self.updateQuietCutoff(move, depth, ply)
+                        break
+        self.batchScores[ply + 1] = None
+
+        if self.useTranspositionTable:
+            self.storeNode(hash, depth, ply, bestScore, originalAlpha, beta, bestMove)
+        return bestScore
+
+    # search() as a generator, for the sliced search: it yields the arguments
+    # (depth, alpha, beta, ply, allowNullMove) of each child search it needs,
+    # is sent back the child's score, and returns its own score; runSearch
+    # runs it from an explicit stack (the plain recursion of search() is
+    # faster, so every other search uses that; keep the two in step)
+    def searchNodeSliced(self, position, depth, alpha, beta, ply, allowNullMove):
+        score, isChecked, hash, hashMove = self.probeNode(position, depth, alpha, beta, ply)
+        if score != None:
+            return score
+        score, staticScore, isFutile, tryNullMove = self.pruneNode(
+            position, depth, alpha, beta, ply, isChecked, allowNullMove)
+        if score != None:
+            return score
+        if tryNullMove:
+            position.makeNullMove()
+            score = -(yield (depth - 1 - self.nullMoveReduction,
+                             -beta, -beta + 1, ply + 1, False))
+            position.unmakeNullMove()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                self.nullMoveCutoffs += 1
+                return beta
+
+        moves = position.getLegalMoves()
+        if moves == []:
+            if isChecked:
+                return -MATE_SCORE + ply
+            return DRAW_SCORE
+        if depth <= 0:
+            return self.getStaticScore(position, ply)
+        self.prepareMoves(position, moves, hashMove, depth, ply, isFutile)
+
+        originalAlpha = alpha
+        bestScore = -INFINITY
+        bestMove = 0
+        for (moveIdx, move) in enumerate(moves):
+            isCapture = position.board[moveTo(move)] != 0
+            position.makeMove(move)
+            if (isFutile and moveIdx > 0 and not isCapture
+                and not position.isChecked(position.sideToMove)):
+                position.unmakeMove(move)
+                self.futilityPrunes += 1
+                bestScore = max(bestScore, staticScore + self.futilityMargins[depth])
+                continue
+            if moveIdx == 0:
+                score = -(yield (depth - 1, -beta, -alpha, ply + 1, True))
+            else:
+                reduction = self.getLateMoveReduction(position, depth, moveIdx, move,
+                                                      isCapture, isChecked, ply)
+                score = yield from self.searchLateMoveSteps(depth, alpha, beta, ply,
+                                                            reduction)
+            position.unmakeMove(move)
+            self.isFollowingPV = False
+            if self.stopped:
+                self.batchScores[ply + 1] = None
+                return 0
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    self.pvTable[ply] = [move] + self.pvTable[ply + 1]
+                    if alpha >= beta:
+                        self.betaCutoffs += 1
+                        if moveIdx == 0:
+                            self.firstMoveCutoffs += 1
+                        if not isCapture and self.useMoveOrdering:
+                            self.updateQuietCutoff(move, depth, ply)
+                        break
+        self.batchScores[ply + 1] = None
+
+        if self.useTranspositionTable:
+            self.storeNode(hash, depth, ply, bestScore, originalAlpha, beta, bestMove)
+        return bestScore
+
+    # runs the search of the root to depth, as a generator: a sliced search
+    # yields whenever the slice is used up, anything else returns at once
+    def runSearch(self, position, depth, alpha, beta):
+        if not self.isSliced:
+            return self.search(position, depth, alpha, beta)
+        # explicit stack of searchNodeSliced generators, with nodes near the leaves
+        # searched in one go
+        stack = [self.searchNodeSliced(position, depth, alpha, beta, 0, True)]
+        score = None
+        while stack != []:
+            if self.isSliceOver():
+                yield
+            try:
+                childArgs = stack[-1].send(score)
+            except StopIteration as result:
+                stack.pop()
+                score = result.value
+                continue
+            if childArgs[0] <= SLICE_LEAF_DEPTH:
+                score = self.search(position, *childArgs)
+            else:
+                stack.append(self.searchNodeSliced(position, *childArgs))
+                score = None
+        return score
+
+    # searches the root to depth, inside an aspiration window around the
+    # previous iteration's score that widens until the score falls inside it
+    def searchRoot(self, position, depth, previousScore):
+        if not self.useAspiration or depth == 1:
+            self.isFollowingPV = True
+            return (yield from self.runSearch(position, depth, -INFINITY, INFINITY))
+        window = self.aspirationWindow
+        alpha = max(previousScore - window, -INFINITY)
+        beta = min(previousScore + window, INFINITY)
+        while True:
+            self.isFollowingPV = True
+            score = yield from self.runSearch(position, depth, alpha, beta)
+            if self.stopped:
+                return score
+            if score <= alpha:
+                alpha = max(score - window, -INFINITY)
+            elif score >= beta:
+                beta = min(score + window, INFINITY)
+            else:
+                return score
+            self.aspirationResearches += 1
+            window *= 2
+
+    # iterative deepening: searches depth 1, 2, ... maxDepth until timeLimit
+    # seconds or nodeLimit nodes are used, and returns (bestMove, score) from
+    # the last completed iteration, or (None, score) if there are no legal moves
+    def getBestMove(self, position, maxDepth, timeLimit = None, nodeLimit = None):
+        self.isSliced = False
+        return runGenerator(self.iterateDeepening(position, maxDepth, timeLimit, nodeLimit))
+
+    # the body of getBestMove, as a generator so a sliced search can pause it
+    def iterateDeepening(self, position, maxDepth, timeLimit, nodeLimit):
+        self.tt.newSearch()
+        self.resetStats()
+        self.timeLimit = timeLimit
+        self.nodeLimit = nodeLimit
+        self.startTime = time.perf_counter()
+        self.stopped = False
+        self.completedDepth = 0
+        self.pv = []
+        self.killers = [[0, 0] for ply in range(MAX_PLY + 1)]
+        self.history = [score // 2 for score in self.history]
+
+        moves = position.getLegalMoves()
+        if moves == []:
+            if position.isChecked(position.sideToMove):
+                return None, -MATE_SCORE
+            return None, DRAW_SCORE
+        # a position the tablebases cover needs no search
+        if self.tablebase != None:
+            result = self.tablebase.getBestMove(position)
+            if result != None:
+                self.pv = [result[0]]
+                return result
+        # if not even depth 1 finishes, any legal move beats none
+        bestMove, bestScore = moves[0], self.evaluate(position)
+        for depth in range(1, maxDepth + 1):
+            score = yield from self.searchRoot(position, depth, bestScore)
+            if self.stopped:
+                break
+            self.pv = self.pvTable[0]
+            bestMove, bestScore = self.pv[0], score
+            self.completedDepth = depth
+            # a forced mate will not get any better
+            if abs(score) > MATE_BOUND:
+                break
+        return bestMove, bestScore
+
+    ########################
+    # TIME-SLICED SEARCH
+    ########################
+
+    # starts a getBestMove search that runs a slice at a time, each slice
+    # ending after sliceNodes nodes or sliceTime seconds (None for no limit);
+    # position belongs to the search until it finishes; timeLimit counts the
+    # time between slices too
+    def startSlicedSearch(self, position, maxDepth, timeLimit = None, nodeLimit = None,
+                          sliceNodes = None, sliceTime = SLICE_TIME):
+        self.isSliced = True
+        self.sliceNodes = sliceNodes
+        self.sliceTime = sliceTime
+        # seconds each slice took, to tune the quota against the timer delay
+        self.sliceLatencies = []
+        self.resetStats()
+        self.slicedSearch = self.iterateDeepening(position, maxDepth, timeLimit, nodeLimit)
+
+    # runs one slice of the search from startSlicedSearch; returns None while
+    # it is unfinished, then getBestMove's (bestMove, score)
+    def continueSlicedSearch(self):
+        sliceStart = time.perf_counter()
+        self.sliceEndNodes = None
+        if self.sliceNodes != None:
+            self.sliceEndNodes = self.nodes + self.sliceNodes
+        self.sliceEndTime = None
+        if self.sliceTime != None:
+            self.sliceEndTime = sliceStart + self.sliceTime
+        result = None
+        try:
+            next(self.slicedSearch)
+        except StopIteration as stop:
+            result = stop.value
+            self.slicedSearch = None
+        self.sliceLatencies.append(time.perf_counter() - sliceStart)
+        return result
+
+    def isSliceOver(self):
+        return ((self.sliceEndNodes != None and self.nodes >= self.sliceEndNodes) or
+                (self.sliceEndTime != None and time.perf_counter() >= self.sliceEndTime))
+
+    # drops an unfinished sliced search
+    def cancelSlicedSearch(self):
+        self.slicedSearch = None
+
+# runs generator to the end and returns its return value
+def runGenerator(generator):
+    try:
+        while True:
+            next(generator)
+    except StopIteration as result:
+        return result.value
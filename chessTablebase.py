@@ -0,0 +1,311 @@
+#################################################
+# chessTablebase.py
+#
+# Endgame tablebases: distance-to-mate tables for a king and a few pieces
+# against a lone king, built by retrograde analysis and memory-mapped by
+# the search
+# usage: python chessTablebase.py [signature ...]
+#################################################
+
+import mmap
+import os
+import sys
+import time
+from itertools import product
+from chessAttacks import (KING_ATTACKS, KNIGHT_ATTACKS, getRookAttacks,
+                          getBishopAttacks, getQueenAttacks)
+from chessPosition import (WHITE, KNIGHT, BISHOP, ROOK, KING, PIECE_LETTERS,
+                           iterSquares, countBits)
+from chessSearch import MATE_SCORE, DRAW_SCORE
+
+# the stronger side's pieces are listed between the kings, in this order
+SIGNATURE_ORDER = "QRBNP"
+TABLEBASE_SIGNATURES = ("KQK", "KRK", "KBNK")
+
+# where the table for signature is kept
+def getTablebasePath(signature):
+    return f"tablebase{signature}.bin"
+
+#################################################
+# INDEXING
+#################################################
+
+# a table has one byte per (side to move, strong king, weak king, strong
+# pieces...): 0 for a draw (or an impossible position), otherwise one more
+# than the number of plies to mate, the strong side always being the winner;
+# the side to move is 0 for the strong side and 1 for the lone king
+
+# the 8 symmetries of the board (there are no pawns) take the strong king
+# into the triangle row <= col <= 3, so it has only 10 squares
+TRIANGLE_SQUARES = [row * 8 + col for row in range(4) for col in range(row, 4)]
+TRIANGLE_INDEX = {square: idx for (idx, square) in enumerate(TRIANGLE_SQUARES)}
+
+def transformSquare(square, flipRow, flipCol, transpose):
+    row, col = square >> 3, square & 7
+    if flipRow:
+        row = 7 - row
+    if flipCol:
+        col = 7 - col
+    if transpose:
+        row, col = col, row
+    return row * 8 + col
+
+# CANONICAL_MAPS[square] maps every square the same way as the symmetry that
+# takes a strong king on square into the triangle
+def getCanonicalMap(kingSquare):
+    row, col = kingSquare >> 3, kingSquare & 7
+    flipRow, flipCol = row > 3, col > 3
+    row, col = (7 - row if flipRow else row), (7 - col if flipCol else col)
+    return [transformSquare(square, flipRow, flipCol, row > col) for square in range(64)]
+
+CANONICAL_MAPS = [getCanonicalMap(square) for square in range(64)]
+TRANSPOSE_MAP = [transformSquare(square, False, False, True) for square in range(64)]
+
+# a king on the triangle's diagonal leaves two images of the position in
+# the table, its own and its transpose, and both are kept
+def isOnDiagonal(square):
+    return square >> 3 == square & 7
+
+# returns the table index of squares, (strong king, weak king, strong pieces...)
+def getIndex(sideToMove, squares):
+    squareMap = CANONICAL_MAPS[squares[0]]
+    idx = sideToMove * 10 + TRIANGLE_INDEX[squareMap[squares[0]]]
+    for square in squares[1:]:
+        idx = idx * 64 + squareMap[square]
+    return idx
+
+# inverse of getIndex for a table with numPieces strong pieces
+def getSquares(idx, numPieces):
+    pieces = []
+    for i in range(numPieces):
+        pieces.append(idx & 63)
+        idx >>= 6
+    weakKing = idx & 63
+    idx >>= 6
+    sideToMove, triangleIdx = divmod(idx, 10)
+    return sideToMove, [TRIANGLE_SQUARES[triangleIdx], weakKing] + pieces[::-1]
+
+def getTableSize(numPieces):
+    return 2 * 10 * 64 ** (numPieces + 1)
+
+# the strong piece types of signature ("KBNK" -> [BISHOP, KNIGHT])
+def getSignaturePieces(signature):
+    return [PIECE_LETTERS[letter] for letter in signature[1:-1]]
+
+# the signature for strong pieces of types pieceTypes
+def getSignature(pieceTypes):
+    letters = "".join(sorted(("PNBRQK"[pieceType - 1] for pieceType in pieceTypes),
+                             key = SIGNATURE_ORDER.index))
+    return "K" + letters + "K"
+
+# a king and at most one minor piece cannot mate
+def isInsufficientMaterial(pieceTypes):
+    return (len(pieceTypes) == 0 or
+            (len(pieceTypes) == 1 and pieceTypes[0] in (KNIGHT, BISHOP)))
+
+#################################################
+# GENERATION
+#################################################
+
+def getPieceAttacks(pieceType, square, occupancy):
+    if pieceType == KING:
+        return KING_ATTACKS[square]
+    elif pieceType == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    elif pieceType == BISHOP:
+        return getBishopAttacks(square, occupancy)
+    elif pieceType == ROOK:
+        return getRookAttacks(square, occupancy)
+    return getQueenAttacks(square, occupancy)
+
+# squares the strong side attacks, with sliders seeing through the weak king
+def getStrongAttacks(squares, pieceTypes):
+    occupancy = 1 << squares[0]
+    for square in squares[2:]:
+        occupancy |= 1 << square
+    attacks = KING_ATTACKS[squares[0]]
+    for (pieceType, square) in zip(pieceTypes, squares[2:]):
+        attacks |= getPieceAttacks(pieceType, square, occupancy)
+    return attacks
+
+# builds the table for signature by retrograde analysis: from every mate,
+# steps back one strong move to positions won in one more ply, then one weak
+# move to positions whose every move is now known to lose; returns the table
+def generateTable(signature):
+    pieceTypes = getSignaturePieces(signature)
+    numPieces = len(pieceTypes)
+    # taking a piece must leave a drawn ending, since no smaller table is read
+    for idx in range(numPieces):
+        if not isInsufficientMaterial(pieceTypes[:idx] + pieceTypes[idx + 1:]):
+            raise ValueError(f"{signature}: captures lead out of the table")
+    half = getTableSize(numPieces) // 2
+    values = bytearray(2 * half)
+    # legal moves left for each lone king position, DRAWN once one draws
+    DRAWN = 255
+    moveCounts = bytearray(half)
+
+    # the lone king to move: mated, drawn, or counting its moves
+    lost = []
+    idx = half
+    for sk in TRIANGLE_SQUARES:
+        for wk in range(64):
+            for pieces in product(range(64), repeat = numPieces):
+                squares = (sk, wk) + pieces
+                if (len(set(squares)) < numPieces + 2 or (KING_ATTACKS[sk] >> wk) & 1):
+                    idx += 1
+                    continue
+                attacks = getStrongAttacks(squares, pieceTypes)
+                moves = 0
+                for target in iterSquares(KING_ATTACKS[wk] & ~attacks):
+                    # an undefended piece can be taken, which draws
+                    if target in pieces:
+                        moves = DRAWN
+                        break
+                    moves += 1
+                if moves == 0 and (attacks >> wk) & 1:
+                    values[idx] = 1
+                    lost.append(idx)
+                else:
+                    # stalemate draws too
+                    moveCounts[idx - half] = moves if moves > 0 else DRAWN
+                idx += 1
+
+    plies = 0
+    while lost != []:
+        # strong moves into a lost position win
+        won = []
+        for idx in lost:
+            sideToMove, squares = getSquares(idx, numPieces)
+            wk = squares[1]
+            occupancy = 0
+            for square in squares:
+                occupancy |= 1 << square
+            for piece in [0] + list(range(2, numPieces + 2)):
+                pieceType = KING if piece == 0 else pieceTypes[piece - 2]
+                target = squares[piece]
+                for origin in iterSquares(getPieceAttacks(pieceType, target, occupancy) & ~occupancy):
+                    predecessor = list(squares)
+                    predecessor[piece] = origin
+                    if piece == 0 and (KING_ATTACKS[origin] >> wk) & 1:
+                        continue
+                    # the lone king cannot be in check with the strong side to move
+                    if (getStrongAttacks(predecessor, pieceTypes) >> wk) & 1:
+                        continue
+                    predecessorIdx = getIndex(0, predecessor)
+                    if values[predecessorIdx] == 0:
+                        values[predecessorIdx] = plies + 2
+                        won.append(predecessorIdx)
+                        if isOnDiagonal(TRIANGLE_SQUARES[predecessorIdx // 64 ** (numPieces + 1)]):
+                            twinIdx = getIndex(0, [TRANSPOSE_MAP[square] for square in
+                                                   getSquares(predecessorIdx, numPieces)[1]])
+                            if values[twinIdx] == 0:
+                                values[twinIdx] = plies + 2
+                                won.append(twinIdx)
+        # lone king positions whose last move left lose
+        lost = []
+        for idx in won:
+            sideToMove, squares = getSquares(idx, numPieces)
+            sk, wk = squares[0], squares[1]
+            occupancy = 0
+            for square in squares:
+                occupancy |= 1 << square
+            for origin in iterSquares(KING_ATTACKS[wk] & ~KING_ATTACKS[sk] & ~occupancy):
+                predecessorIdx = half + idx - (wk - origin) * 64 ** numPieces
+                count = moveCounts[predecessorIdx - half]
+                if values[predecessorIdx] != 0 or count == DRAWN:
+                    continue
+                moveCounts[predecessorIdx - half] = count - 1
+                if count == 1:
+                    values[predecessorIdx] = plies + 3
+                    lost.append(predecessorIdx)
+        plies += 2
+    return values
+
+def writeTable(signature):
+    values = generateTable(signature)
+    with open(getTablebasePath(signature), "wb") as tableFile:
+        tableFile.write(values)
+    return values
+
+#################################################
+# PROBING
+#################################################
+
+class Tablebase(object):
+    # maps every table of signatures that has been generated
+    def __init__(self, signatures = TABLEBASE_SIGNATURES):
+        self.tables = {}
+        self.files = []
+        for signature in signatures:
+            path = getTablebasePath(signature)
+            if os.path.exists(path):
+                tableFile = open(path, "rb")
+                self.files.append(tableFile)
+                self.tables[signature] = mmap.mmap(tableFile.fileno(), 0,
+                                                   access = mmap.ACCESS_READ)
+
+    # returns position's exact score for the side to move (mate scores as
+    # seen from ply plies below the root) if a table covers its material or
+    # it is drawn for lack of it, otherwise None
+    def probe(self, position, ply = 0):
+        if countBits(position.occupancy[0] | position.occupancy[1]) > 4 or position.castling:
+            return None
+        strongColor = WHITE if countBits(position.occupancy[WHITE]) > 1 else 1 - WHITE
+        weakColor = 1 - strongColor
+        if countBits(position.occupancy[weakColor]) > 1:
+            return None
+        pieces = [(position.board[square] & 7, square)
+                  for square in iterSquares(position.occupancy[strongColor])
+                  if position.board[square] & 7 != KING]
+        pieceTypes = [pieceType for (pieceType, square) in pieces]
+        if isInsufficientMaterial(pieceTypes):
+            return DRAW_SCORE
+        signature = getSignature(pieceTypes)
+        if signature not in self.tables:
+            return None
+        squares = [position.kingSquares[strongColor], position.kingSquares[weakColor]]
+        for pieceType in getSignaturePieces(signature):
+            for (otherType, square) in pieces:
+                if otherType == pieceType and square not in squares:
+                    squares.append(square)
+                    break
+        sideToMove = 0 if position.sideToMove == strongColor else 1
+        value = self.tables[signature][getIndex(sideToMove, squares)]
+        if value == 0:
+            return DRAW_SCORE
+        score = MATE_SCORE - ply - (value - 1)
+        return score if sideToMove == 0 else -score
+
+    # returns (bestMove, score) in position from the tables, or None if they
+    # do not cover it; the winner takes the quickest mate, the loser the slowest
+    def getBestMove(self, position):
+        if self.probe(position) == None:
+            return None
+        bestMove, bestScore = None, None
+        for move in position.getLegalMoves():
+            position.makeMove(move)
+            score = self.probe(position, 1)
+            position.unmakeMove(move)
+            if score == None:
+                return None
+            if bestMove == None or -score > bestScore:
+                bestMove, bestScore = move, -score
+        return bestMove, bestScore
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        for tableFile in self.files:
+            tableFile.close()
+        self.tables = {}
+        self.files = []
+
+# generates the tables for the signatures given (all of them by default)
+if __name__ == "__main__":
+    signatures = sys.argv[1:] or TABLEBASE_SIGNATURES
+    for signature in signatures:
+        startTime = time.perf_counter()
+        values = writeTable(signature)
+        longest = max(values) - 1
+        print(f"{signature}: {len(values)} bytes, longest mate {longest} plies, "
+              f"{time.perf_counter() - startTime:.1f} s")